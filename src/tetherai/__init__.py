@@ -1,21 +1,63 @@
-from typing import Any
+import importlib
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, TypeVar
 
 from tetherai._version import __version__
-from tetherai.circuit_breaker import enforce_budget
-from tetherai.config import TetherConfig, load_config
-from tetherai.exceptions import (
-    BudgetExceededError,
-    TetherError,
-    TokenCountError,
-    TurnLimitError,
-    UnknownModelError,
-)
+
+if TYPE_CHECKING:
+    from tetherai.circuit_breaker import enforce_budget
+    from tetherai.config import TetherConfig, load_config
+    from tetherai.exceptions import (
+        BudgetExceededError,
+        TetherError,
+        TokenCountError,
+        TurnLimitError,
+        UnknownModelError,
+    )
+
+# Public names are resolved on first access (PEP 562) so that `import tetherai`
+# does not pull in the interceptor, pricing and token counting stack.
+_LAZY_ATTRS = {
+    "enforce_budget": "tetherai.circuit_breaker",
+    "TetherConfig": "tetherai.config",
+    "load_config": "tetherai.config",
+    "BudgetExceededError": "tetherai.exceptions",
+    "TetherError": "tetherai.exceptions",
+    "TokenCountError": "tetherai.exceptions",
+    "TurnLimitError": "tetherai.exceptions",
+    "UnknownModelError": "tetherai.exceptions",
+}
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
 
 
 class Tether:
     """TetherAI namespace class."""
 
-    enforce_budget = staticmethod(enforce_budget)
+    # Same signature as circuit_breaker.enforce_budget, which is imported on first call.
+    @staticmethod
+    def enforce_budget(
+        max_usd: float,
+        max_turns: int | None = None,
+        on_exceed: str = "raise",
+        trace_export: str | None = None,
+    ) -> Callable[[_F], _F]:
+        from tetherai.circuit_breaker import enforce_budget as _enforce_budget
+
+        return _enforce_budget(
+            max_usd, max_turns=max_turns, on_exceed=on_exceed, trace_export=trace_export
+        )
 
 
 tether = Tether
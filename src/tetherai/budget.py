@@ -1,17 +1,14 @@
+import math
 import threading
-from dataclasses import dataclass
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Any
 
 from tetherai.exceptions import BudgetExceededError, TurnLimitError
 
-
-@dataclass
-class CallRecord:
-    input_tokens: int
-    output_tokens: int
-    model: str
-    cost_usd: float
-    duration_ms: float
+# pre_check skips the lock while the projected spend stays below this fraction
+# of the budget; only calls close to the limit need the authoritative check.
+PRE_CHECK_LOCK_THRESHOLD = 0.95
 
 
 class BudgetTracker:
@@ -24,32 +21,39 @@ class BudgetTracker:
         self.run_id = run_id
         self.max_usd = max_usd
         self.max_turns = max_turns
+        self.unlimited = math.isinf(max_usd)
         self._spent_usd = 0.0
         self._turn_count = 0
-        self._calls: list[CallRecord] = []
+        self._total_input_tokens = 0
+        self._total_output_tokens = 0
+        self._total_duration_ms = 0.0
+        self._calls_by_model: dict[str, int] = {}
+        self._summary: Mapping[str, Any] | None = None
         self._lock = threading.Lock()
 
     @property
     def spent_usd(self) -> float:
-        with self._lock:
-            return self._spent_usd
+        return self._spent_usd
 
     @property
     def remaining_usd(self) -> float:
-        with self._lock:
-            return max(0.0, self.max_usd - self._spent_usd)
+        return max(0.0, self.max_usd - self._spent_usd)
 
     @property
     def turn_count(self) -> int:
-        with self._lock:
-            return self._turn_count
+        return self._turn_count
 
     @property
     def is_exceeded(self) -> bool:
-        with self._lock:
-            return self._spent_usd >= self.max_usd
+        return self._spent_usd >= self.max_usd
 
     def pre_check(self, estimated_cost: float, model: str = "unknown") -> None:
+        spent = self._spent_usd
+        if estimated_cost <= 0.0 and spent < self.max_usd:
+            return
+        if spent + estimated_cost < self.max_usd * PRE_CHECK_LOCK_THRESHOLD:
+            return
+
         with self._lock:
             projected = self._spent_usd + estimated_cost
             if projected >= self.max_usd:
@@ -87,32 +91,30 @@ class BudgetTracker:
             if self._spent_usd > self.max_usd:
                 self._spent_usd = self.max_usd
 
-            self._calls.append(
-                CallRecord(
-                    input_tokens=input_tokens,
-                    output_tokens=output_tokens,
-                    model=model,
-                    cost_usd=cost_usd,
-                    duration_ms=duration_ms,
-                )
-            )
+            self._total_input_tokens += input_tokens
+            self._total_output_tokens += output_tokens
+            self._total_duration_ms += duration_ms
+            self._calls_by_model[model] = self._calls_by_model.get(model, 0) + 1
+            self._summary = None
 
-    def get_summary(self) -> dict[str, Any]:
+    def get_summary(self) -> Mapping[str, Any]:
         with self._lock:
-            return {
+            if self._summary is None:
+                self._summary = self._build_summary()
+            return self._summary
+
+    def _build_summary(self) -> Mapping[str, Any]:
+        return MappingProxyType(
+            {
                 "run_id": self.run_id,
                 "budget_usd": self.max_usd,
                 "spent_usd": self._spent_usd,
                 "remaining_usd": max(0.0, self.max_usd - self._spent_usd),
                 "turn_count": self._turn_count,
-                "calls": [
-                    {
-                        "input_tokens": call.input_tokens,
-                        "output_tokens": call.output_tokens,
-                        "model": call.model,
-                        "cost_usd": call.cost_usd,
-                        "duration_ms": call.duration_ms,
-                    }
-                    for call in self._calls
-                ],
+                "total_input_tokens": self._total_input_tokens,
+                "total_output_tokens": self._total_output_tokens,
+                "total_duration_ms": self._total_duration_ms,
+                # Nested proxy too: the summary is shared by every caller until the next call.
+                "calls_by_model": MappingProxyType(dict(self._calls_by_model)),
             }
+        )
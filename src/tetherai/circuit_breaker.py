@@ -1,13 +1,14 @@
 import asyncio
+import contextlib
 import functools
-import uuid
-from collections.abc import Callable
+import secrets
+from collections.abc import Callable, Iterator
 from typing import Any, TypeVar
 
 from tetherai.budget import BudgetTracker
-from tetherai.config import TetherConfig
+from tetherai.config import load_config
 from tetherai.exceptions import BudgetExceededError
-from tetherai.exporter import get_exporter
+from tetherai.exporter import StreamingTraceExporter, get_exporter
 from tetherai.interceptor import LLMInterceptor
 from tetherai.pricing import PricingRegistry
 from tetherai.token_counter import TokenCounter
@@ -16,6 +17,18 @@ from tetherai.trace import TraceCollector
 F = TypeVar("F", bound=Callable[..., Any])
 
 
+# Pricing and the token counter hold no per-run state, so every run shares one
+# instance instead of reloading encoders. load_config() is cached on the env.
+@functools.lru_cache(maxsize=1)
+def _shared_pricing() -> PricingRegistry:
+    return PricingRegistry()
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_token_counter() -> TokenCounter:
+    return TokenCounter()
+
+
 def enforce_budget(
     max_usd: float,
     max_turns: int | None = None,
@@ -23,20 +36,23 @@ def enforce_budget(
     trace_export: str | None = None,
 ) -> Callable[[F], F]:
     def decorator(func: F) -> F:
+        # Only build the wrapper that will be returned; functools.wraps is not free.
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                return await _run_with_budget_async(
+                    func, max_usd, max_turns, on_exceed, trace_export, *args, **kwargs
+                )
+
+            return async_wrapper  # type: ignore[return-value]
+
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             return _run_with_budget(
                 func, max_usd, max_turns, on_exceed, trace_export, *args, **kwargs
             )
 
-        @functools.wraps(func)
-        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
-            return await _run_with_budget_async(
-                func, max_usd, max_turns, on_exceed, trace_export, *args, **kwargs
-            )
-
-        if asyncio.iscoroutinefunction(func):
-            return async_wrapper  # type: ignore[return-value]
         return wrapper  # type: ignore[return-value]
 
     return decorator
@@ -51,41 +67,10 @@ def _run_with_budget(
     *args: Any,
     **kwargs: Any,
 ) -> Any:
-    run_id = f"run-{uuid.uuid4().hex[:8]}"
-    config = TetherConfig()
-
-    if trace_export is None:
-        trace_export = config.trace_export
-
-    budget_tracker = BudgetTracker(run_id=run_id, max_usd=max_usd, max_turns=max_turns)
-    token_counter = TokenCounter()
-    pricing = PricingRegistry()
-    trace_collector = TraceCollector()
-
-    trace_collector.start_trace(run_id, budget_tracker.get_summary())
-
-    interceptor = LLMInterceptor(
-        budget_tracker=budget_tracker,
-        token_counter=token_counter,
-        pricing=pricing,
-        trace_collector=trace_collector,
-    )
-
-    try:
-        interceptor.activate()
-        result = func(*args, **kwargs)
-        return result
-    except BudgetExceededError:
-        if on_exceed == "return_none":
-            return None
-        raise
-    finally:
-        interceptor.deactivate()
-        trace = trace_collector.end_trace()
-        if trace and trace_export != "none":
-            trace.budget_summary = budget_tracker.get_summary()
-            exporter = get_exporter(trace_export, config.trace_export_path)
-            exporter.export(trace)
+    with _budget_context(max_usd, max_turns, on_exceed, trace_export):
+        return func(*args, **kwargs)
+    # Only reached when on_exceed="return_none" swallowed a BudgetExceededError.
+    return None
 
 
 async def _run_with_budget_async(
@@ -97,38 +82,53 @@ async def _run_with_budget_async(
     *args: Any,
     **kwargs: Any,
 ) -> Any:
-    run_id = f"run-{uuid.uuid4().hex[:8]}"
-    config = TetherConfig()
+    with _budget_context(max_usd, max_turns, on_exceed, trace_export):
+        return await func(*args, **kwargs)
+    return None
+
+
+@contextlib.contextmanager
+def _budget_context(
+    max_usd: float,
+    max_turns: int | None,
+    on_exceed: str,
+    trace_export: str | None,
+) -> Iterator[None]:
+    run_id = f"run-{secrets.token_hex(4)}"
+    config = load_config()
 
     if trace_export is None:
         trace_export = config.trace_export
 
+    # Exporters that can stream spans (jsonl) receive each span as it completes
+    # instead of the whole trace at the end of the run.
+    exporter = get_exporter(trace_export, config.trace_export_path)
+    stream = exporter if isinstance(exporter, StreamingTraceExporter) else None
+
     budget_tracker = BudgetTracker(run_id=run_id, max_usd=max_usd, max_turns=max_turns)
-    token_counter = TokenCounter()
-    pricing = PricingRegistry()
-    trace_collector = TraceCollector()
+    trace_collector = TraceCollector(span_writer=stream.write_span if stream else None)
 
     trace_collector.start_trace(run_id, budget_tracker.get_summary())
 
     interceptor = LLMInterceptor(
         budget_tracker=budget_tracker,
-        token_counter=token_counter,
-        pricing=pricing,
+        token_counter=_shared_token_counter(),
+        pricing=_shared_pricing(),
         trace_collector=trace_collector,
+        capture_previews=config.capture_previews,
     )
 
     try:
         interceptor.activate()
-        result = await func(*args, **kwargs)
-        return result
+        yield
     except BudgetExceededError:
-        if on_exceed == "return_none":
-            return None
-        raise
+        if on_exceed != "return_none":
+            raise
     finally:
         interceptor.deactivate()
-        trace = trace_collector.end_trace()
+        trace = trace_collector.end_trace(budget_tracker.get_summary())
         if trace and trace_export != "none":
-            trace.budget_summary = budget_tracker.get_summary()
-            exporter = get_exporter(trace_export, config.trace_export_path)
-            exporter.export(trace)
+            if stream is not None:
+                stream.finish(trace)
+            else:
+                exporter.export(trace)
@@ -1,10 +1,23 @@
+import functools
+import importlib.util
 import os
-from dataclasses import dataclass
-from typing import Any, Literal, cast
+from dataclasses import dataclass, replace
+from typing import Any, Literal, cast, get_args
 
 TokenCounterBackend = Literal["tiktoken", "litellm", "auto"]
 PricingSource = Literal["bundled", "litellm"]
-TraceExport = Literal["console", "json", "none", "otlp"]
+TraceExport = Literal["console", "json", "jsonl", "jsonl_mp", "none", "otlp"]
+
+_VALID_BACKENDS = frozenset(get_args(TokenCounterBackend))
+_VALID_PRICING = frozenset(get_args(PricingSource))
+_VALID_EXPORT = frozenset(get_args(TraceExport))
+
+
+# The one "auto" probe, shared with TokenCounter. Checked without importing:
+# litellm itself is only loaded on the first count.
+@functools.lru_cache(maxsize=1)
+def _resolve_auto_backend() -> TokenCounterBackend:
+    return "litellm" if importlib.util.find_spec("litellm") is not None else "tiktoken"
 
 
 @dataclass(frozen=True)
@@ -17,6 +30,7 @@ class TetherConfig:
     log_level: str = "WARNING"
     trace_export: TraceExport = "console"
     trace_export_path: str = "./tetherai_traces/"
+    capture_previews: bool = True
 
     def __post_init__(self) -> None:
         if self.default_budget_usd < 0:
@@ -25,23 +39,21 @@ class TetherConfig:
         if self.default_max_turns is not None and self.default_max_turns < 0:
             raise ValueError("default_max_turns must be non-negative")
 
-        valid_backends = ("tiktoken", "litellm", "auto")
-        if self.token_counter_backend not in valid_backends:
+        if self.token_counter_backend not in _VALID_BACKENDS:
             raise ValueError(
                 f"Invalid token_counter_backend: {self.token_counter_backend}. "
-                f"Must be one of {valid_backends}"
+                f"Must be one of {sorted(_VALID_BACKENDS)}"
             )
 
-        valid_pricing = ("bundled", "litellm")
-        if self.pricing_source not in valid_pricing:
+        if self.pricing_source not in _VALID_PRICING:
             raise ValueError(
-                f"Invalid pricing_source: {self.pricing_source}. Must be one of {valid_pricing}"
+                f"Invalid pricing_source: {self.pricing_source}. "
+                f"Must be one of {sorted(_VALID_PRICING)}"
             )
 
-        valid_export = ("console", "json", "none", "otlp")
-        if self.trace_export not in valid_export:
+        if self.trace_export not in _VALID_EXPORT:
             raise ValueError(
-                f"Invalid trace_export: {self.trace_export}. Must be one of {valid_export}"
+                f"Invalid trace_export: {self.trace_export}. Must be one of {sorted(_VALID_EXPORT)}"
             )
 
     @classmethod
@@ -61,31 +73,47 @@ class TetherConfig:
                 TraceExport, os.getenv("TETHERAI_TRACE_EXPORT", "console") or "console"
             ),
             trace_export_path=os.getenv("TETHERAI_TRACE_EXPORT_PATH", "./tetherai_traces/"),
+            capture_previews=os.getenv("TETHERAI_CAPTURE_PREVIEWS", "true").lower()
+            not in ("0", "false", "no"),
         )
 
     @staticmethod
     def _resolve_backend(backend: str) -> TokenCounterBackend:
         if backend == "auto":
-            try:
-                import litellm  # noqa: F401
-
-                return "litellm"
-            except ImportError:
-                return "tiktoken"
+            return _resolve_auto_backend()
         return backend  # type: ignore[return-value]
 
     def resolve_backend(self) -> TokenCounterBackend:
         return self._resolve_backend(self.token_counter_backend)
 
 
+_FIELD_NAMES = frozenset(TetherConfig.__dataclass_fields__)
+
+_ENV_VARS = (
+    "TETHERAI_COLLECTOR_URL",
+    "TETHERAI_DEFAULT_BUDGET_USD",
+    "TETHERAI_DEFAULT_MAX_TURNS",
+    "TETHERAI_TOKEN_COUNTER_BACKEND",
+    "TETHERAI_PRICING_SOURCE",
+    "TETHERAI_LOG_LEVEL",
+    "TETHERAI_TRACE_EXPORT",
+    "TETHERAI_TRACE_EXPORT_PATH",
+    "TETHERAI_CAPTURE_PREVIEWS",
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _env_config(env_snapshot: tuple[str | None, ...]) -> TetherConfig:
+    # Keyed on the current values of the TETHERAI_* variables, so changing the
+    # environment still produces a fresh config.
+    return TetherConfig.from_env()
+
+
 def load_config(**kwargs: Any) -> TetherConfig:
-    env_config = TetherConfig.from_env()
+    env_config = _env_config(tuple(os.environ.get(name) for name in _ENV_VARS))
 
-    config_dict = {}
-    for field_name in TetherConfig.__dataclass_fields__:
-        if field_name in kwargs:
-            config_dict[field_name] = kwargs[field_name]
-        else:
-            config_dict[field_name] = getattr(env_config, field_name)
+    overrides = {name: value for name, value in kwargs.items() if name in _FIELD_NAMES}
+    if not overrides:
+        return env_config
 
-    return TetherConfig(**config_dict)
+    return replace(env_config, **overrides)
@@ -1,5 +1,7 @@
 from typing import TYPE_CHECKING, Any
 
+from tetherai.circuit_breaker import _run_with_budget
+
 if TYPE_CHECKING:
     from crewai import Crew
 
@@ -23,15 +25,21 @@ class ProtectedCrew:
         max_turns: int | None = None,
         trace_export: str | None = None,
     ):
-        from tetherai.circuit_breaker import enforce_budget
-
         self._crew = crew
         self._max_usd = max_usd
         self._max_turns = max_turns
-
-        self.kickoff = enforce_budget(
-            max_usd=max_usd, max_turns=max_turns, trace_export=trace_export
-        )(crew.kickoff)
+        self._trace_export = trace_export
+
+    def kickoff(self, *args: Any, **kwargs: Any) -> Any:
+        return _run_with_budget(
+            self._crew.kickoff,
+            self._max_usd,
+            self._max_turns,
+            "raise",
+            self._trace_export,
+            *args,
+            **kwargs,
+        )
 
     def __getattr__(self, name: str) -> Any:
         return getattr(self._crew, name)
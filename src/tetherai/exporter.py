@@ -1,9 +1,64 @@
+import atexit
+import contextlib
+import gzip
+import io
 import json
+import multiprocessing
+import os
+import queue
 import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
 from pathlib import Path
-from typing import Protocol, runtime_checkable
+from typing import Any, Literal, Protocol, runtime_checkable
 
-from tetherai.trace import Trace
+from tetherai.trace import Span, Trace
+
+try:
+    import orjson
+
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+TRACE_SUMMARY_TYPE = "trace_summary"
+MAX_PROCESS_EXPORTERS = 8
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, Span):
+        return obj.to_dict()
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    # Span metadata is caller-supplied; never let it fail the export.
+    return str(obj)
+
+
+def _dumps(obj: Any, pretty: bool = False) -> bytes:
+    if _HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        try:
+            return orjson.dumps(obj, default=_json_default, option=option)
+        except orjson.JSONEncodeError:
+            # Integers wider than 64 bits; the stdlib encoder handles them.
+            pass
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=_json_default).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode(
+        "utf-8"
+    )
+
+
+def _span_data(span: Span) -> Any:
+    # orjson serializes the slots dataclass (and its datetime) natively, in the
+    # same shape as Span.to_dict(), without building an intermediate dict.
+    return span if _HAS_ORJSON else span.to_dict()
+
+
+def _summary_record(trace: Trace) -> dict[str, Any]:
+    # Last line of an NDJSON trace; the spans were written before it.
+    return {"type": TRACE_SUMMARY_TYPE, **trace.summary_dict()}
 
 
 @runtime_checkable
@@ -11,37 +66,291 @@ class TraceExporter(Protocol):
     def export(self, trace: Trace) -> None: ...
 
 
+@runtime_checkable
+class StreamingTraceExporter(TraceExporter, Protocol):
+    """Receives each span as it completes, then the finished trace once at run end."""
+
+    def write_span(self, span: Span) -> None: ...
+
+    def finish(self, trace: Trace) -> None: ...
+
+
 class ConsoleExporter:
     def export(self, trace: Trace) -> None:
-        print(f"=== TetherAI Trace: {trace.run_id} ===", file=sys.stderr)
-        print(f"Total Cost: ${trace.total_cost:.4f}", file=sys.stderr)
-        print(f"Input Tokens: {trace.total_input_tokens}", file=sys.stderr)
-        print(f"Output Tokens: {trace.total_output_tokens}", file=sys.stderr)
-        print(f"Spans: {len(trace.spans)}", file=sys.stderr)
-        print(file=sys.stderr)
+        total_cost, total_input_tokens, total_output_tokens = trace.totals()
+        parts = [
+            f"=== TetherAI Trace: {trace.run_id} ===\n",
+            f"Total Cost: ${total_cost:.4f}\n",
+            f"Input Tokens: {total_input_tokens}\n",
+            f"Output Tokens: {total_output_tokens}\n",
+            f"Spans: {len(trace.spans)}\n",
+            "\n",
+        ]
 
         for i, span in enumerate(trace.spans):
-            print(f"  [{i + 1}] {span.span_type}: {span.model or 'N/A'}", file=sys.stderr)
+            parts.append(f"  [{i + 1}] {span.span_type}: {span.model or 'N/A'}\n")
             if span.cost_usd is not None:
-                print(f"      Cost: ${span.cost_usd:.6f}", file=sys.stderr)
+                parts.append(f"      Cost: ${span.cost_usd:.6f}\n")
             if span.input_tokens:
-                print(f"      Input: {span.input_tokens} tokens", file=sys.stderr)
+                parts.append(f"      Input: {span.input_tokens} tokens\n")
             if span.output_tokens:
-                print(f"      Output: {span.output_tokens} tokens", file=sys.stderr)
-            print(file=sys.stderr)
+                parts.append(f"      Output: {span.output_tokens} tokens\n")
+            parts.append("\n")
+
+        # One write instead of a print per line: stderr is unbuffered.
+        sys.stderr.write("".join(parts))
+        sys.stderr.flush()
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes")
 
 
 class JSONFileExporter:
-    def __init__(self, output_dir: str = "./tetherai_traces/"):
+    def __init__(
+        self,
+        output_dir: str = "./tetherai_traces/",
+        compress: bool | None = None,
+        pretty: bool | None = None,
+    ):
         self.output_dir = Path(output_dir)
+        self.compress = _env_flag("TETHERAI_TRACE_GZIP") if compress is None else compress
+        self.pretty = _env_flag("TETHERAI_TRACE_PRETTY") if pretty is None else pretty
 
     def export(self, trace: Trace) -> None:
         self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        data = _dumps(trace.to_dict(_span_data), pretty=self.pretty)
+
+        if self.compress:
+            filepath = self.output_dir / f"{trace.run_id}.json.gz"
+            with gzip.open(filepath, "wb", compresslevel=6) as f:
+                f.write(data)
+            return
+
         filename = f"{trace.run_id}.json"
         filepath = self.output_dir / filename
 
-        with open(filepath, "w") as f:
-            json.dump(trace.to_dict(), f, indent=2)
+        with open(filepath, "wb") as f:
+            f.write(data)
+
+
+class JSONLFileExporter:
+    def __init__(self, output_dir: str = "./tetherai_traces/", compress: bool | None = None):
+        self.output_dir = Path(output_dir)
+        self.compress = _env_flag("TETHERAI_TRACE_GZIP") if compress is None else compress
+        self._files: dict[str, io.BufferedIOBase] = {}
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        with self._open(trace.run_id, "wb") as f:
+            f.writelines(_dumps(_span_data(span)) + b"\n" for span in trace.spans)
+            f.write(_dumps(_summary_record(trace)) + b"\n")
+
+    def write_span(self, span: Span) -> None:
+        self._write(span.run_id, _dumps(_span_data(span)))
+
+    def finish(self, trace: Trace) -> None:
+        """Append the run's summary record and close its stream."""
+        self._write(trace.run_id, _dumps(_summary_record(trace)))
+        self._close_run(trace.run_id)
+
+    def close(self) -> None:
+        for run_id in list(self._files):
+            self._close_run(run_id)
+
+    def _write(self, run_id: str, line: bytes) -> None:
+        # One handle per run, so a gzip stream is a single member rather than one per span.
+        with self._lock:
+            f = self._files.get(run_id)
+            if f is None:
+                f = self._files[run_id] = self._open(run_id, "ab")
+            f.write(line + b"\n")
+
+    def _close_run(self, run_id: str) -> None:
+        with self._lock:
+            f = self._files.pop(run_id, None)
+            if f is not None:
+                f.close()
+
+    def _open(self, run_id: str, mode: Literal["wb", "ab"]) -> io.BufferedIOBase:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.compress:
+            return gzip.open(self.output_dir / f"{run_id}.ndjson.gz", mode, compresslevel=6)
+        return open(self.output_dir / f"{run_id}.ndjson", mode)
+
+
+def _write_spans(
+    spans: "multiprocessing.Queue[dict[str, Any] | None]",
+    acks: "multiprocessing.Queue[str | None]",
+    output_dir: str,
+    compress: bool,
+) -> None:
+    writer = JSONLFileExporter(output_dir, compress=compress)
+    while (record := spans.get()) is not None:
+        run_id = record["run_id"]
+        writer._write(run_id, _dumps(record))
+        if record.get("type") == TRACE_SUMMARY_TYPE:
+            writer._close_run(run_id)
+            acks.put(run_id)
+    writer.close()
+
+
+class ProcessJSONLExporter:
+    """JSONL exporter that performs file writes in a separate daemon process.
+
+    Spans cross a bounded multiprocessing queue as plain dicts. When the queue is
+    full the span is dropped and counted in ``dropped`` instead of blocking the call.
+    ``finish`` waits until the writer has flushed and closed the run's file.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "./tetherai_traces/",
+        compress: bool | None = None,
+        maxsize: int = 10_000,
+        flush_timeout: float = 5.0,
+    ):
+        self.output_dir = Path(output_dir)
+        self.compress = _env_flag("TETHERAI_TRACE_GZIP") if compress is None else compress
+        self.maxsize = maxsize
+        self.flush_timeout = flush_timeout
+        self.dropped = 0
+        self._queue: multiprocessing.Queue[dict[str, Any] | None] | None = None
+        self._acks: multiprocessing.Queue[str | None] | None = None
+        self._process: multiprocessing.Process | None = None
+        self._ack_reader: threading.Thread | None = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._waiting: set[str] = set()
+        self._flushed: set[str] = set()
+        self._flushed_cond = threading.Condition()
+
+    def export(self, trace: Trace) -> None:
+        for span in trace.spans:
+            self.write_span(span)
+        self.finish(trace)
+
+    def write_span(self, span: Span) -> None:
+        self._put(span.to_dict())
+
+    def finish(self, trace: Trace) -> None:
+        """Queue the run's summary record and wait until the writer has flushed the run."""
+        run_id = trace.run_id
+        with self._lock:
+            if self._closed:
+                self.dropped += 1
+                return
+            spans = self._queue if self._queue is not None else self._start()
+        with self._flushed_cond:
+            self._waiting.add(run_id)
+        try:
+            # Blocks rather than dropping: the writer only closes a run's file on its summary.
+            spans.put(_summary_record(trace), timeout=self.flush_timeout)
+        except (queue.Full, ValueError):
+            # ValueError: close() shut the queue down while this run was finishing.
+            with self._lock:
+                self.dropped += 1
+        else:
+            with self._flushed_cond:
+                self._flushed_cond.wait_for(lambda: run_id in self._flushed, self.flush_timeout)
+        with self._flushed_cond:
+            self._waiting.discard(run_id)
+            self._flushed.discard(run_id)
+
+    def _put(self, record: dict[str, Any]) -> bool:
+        # Under the lock so close() cannot swap the queue out between lookup and put.
+        with self._lock:
+            if self._closed:
+                self.dropped += 1
+                return False
+            spans = self._queue if self._queue is not None else self._start()
+            try:
+                spans.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                return False
+            return True
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush queued spans and stop the writer process."""
+        with self._lock:
+            self._closed = True
+            spans, acks, process, ack_reader = (
+                self._queue,
+                self._acks,
+                self._process,
+                self._ack_reader,
+            )
+            self._queue = self._acks = self._process = self._ack_reader = None
+        if spans is None or acks is None or process is None or ack_reader is None:
+            return
+        # A hung writer may never drain a full queue; it is terminated below.
+        with contextlib.suppress(queue.Full):
+            spans.put(None, timeout=timeout)
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+            spans.cancel_join_thread()
+        acks.put(None)
+        ack_reader.join()
+        spans.close()
+        acks.close()
+        atexit.unregister(self.close)
+
+    def _start(self) -> "multiprocessing.Queue[dict[str, Any] | None]":
+        spans: multiprocessing.Queue[dict[str, Any] | None] = multiprocessing.Queue(
+            maxsize=self.maxsize
+        )
+        acks: multiprocessing.Queue[str | None] = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=_write_spans,
+            args=(spans, acks, str(self.output_dir), self.compress),
+            name="tetherai-span-writer",
+            daemon=True,
+        )
+        process.start()
+        ack_reader = threading.Thread(
+            target=self._read_acks, args=(acks,), name="tetherai-span-acks", daemon=True
+        )
+        ack_reader.start()
+        self._queue, self._acks, self._process = spans, acks, process
+        self._ack_reader = ack_reader
+        atexit.register(self.close)
+        return spans
+
+    def _read_acks(self, acks: "multiprocessing.Queue[str | None]") -> None:
+        while (run_id := acks.get()) is not None:
+            with self._flushed_cond:
+                # An ack that arrives after finish() gave up has nobody to wake.
+                if run_id in self._waiting:
+                    self._flushed.add(run_id)
+                    self._flushed_cond.notify_all()
+
+
+_PROCESS_EXPORTERS: OrderedDict[tuple[str, bool], ProcessJSONLExporter] = OrderedDict()
+_PROCESS_EXPORTERS_LOCK = threading.Lock()
+
+
+def _shared_process_exporter(output_dir: str, compress: bool) -> ProcessJSONLExporter:
+    # One writer process per output directory and compression mode, shared by every run.
+    # A closed exporter (explicit close() or the atexit hook) is replaced, and the least
+    # recently used one is closed when the table is full.
+    key = (output_dir, compress)
+    evicted = None
+    with _PROCESS_EXPORTERS_LOCK:
+        exporter = _PROCESS_EXPORTERS.get(key)
+        if exporter is None or exporter._closed:
+            exporter = _PROCESS_EXPORTERS[key] = ProcessJSONLExporter(
+                output_dir=output_dir, compress=compress
+            )
+        _PROCESS_EXPORTERS.move_to_end(key)
+        if len(_PROCESS_EXPORTERS) > MAX_PROCESS_EXPORTERS:
+            _, evicted = _PROCESS_EXPORTERS.popitem(last=False)
+    if evicted is not None:
+        evicted.close()
+    return exporter
 
 
 class NoopExporter:
@@ -54,6 +363,10 @@ def get_exporter(exporter_type: str, output_dir: str = "./tetherai_traces/") ->
         return ConsoleExporter()
     elif exporter_type == "json":
         return JSONFileExporter(output_dir=output_dir)
+    elif exporter_type == "jsonl":
+        return JSONLFileExporter(output_dir=output_dir)
+    elif exporter_type == "jsonl_mp":
+        return _shared_process_exporter(output_dir, _env_flag("TETHERAI_TRACE_GZIP"))
     elif exporter_type == "none" or exporter_type == "noop":
         return NoopExporter()
     else:
@@ -1,12 +1,133 @@
-import time
-from collections.abc import Callable
-from typing import Any
+import asyncio
+import functools
+import hashlib
+import importlib
+import inspect
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from time import monotonic, perf_counter_ns
+from types import ModuleType
+from typing import Any, TypeVar
 
 from tetherai.budget import BudgetTracker
-from tetherai.exceptions import BudgetExceededError, TetherError
-from tetherai.pricing import PricingRegistry
+from tetherai.exceptions import BudgetExceededError, TetherError, UnknownModelError
+from tetherai.pricing import PricingRegistry, calc_cost
 from tetherai.token_counter import TokenCounter
-from tetherai.trace import Span, TraceCollector
+from tetherai.trace import MAX_PREVIEW_LENGTH, STATUS_ERROR, Span, TraceCollector
+
+T = TypeVar("T")
+
+# Per-1K (input, output, cached input) prices for a model.
+_Rates = tuple[float, float, float]
+
+TOKEN_CACHE_SIZE = 1024
+ESTIMATED_OUTPUT_MULTIPLIER = 4
+_PLAIN_MESSAGE_KEYS = frozenset({"role", "content"})
+
+
+def _messages_key(messages: list[dict[str, Any]], model: str) -> bytes | None:
+    """Content hash of a plain role/content conversation, or None if not cacheable."""
+    digest = hashlib.blake2b(model.encode(), digest_size=16)
+    for message in messages:
+        content = message.get("content", "")
+        if not isinstance(content, str) or not message.keys() <= _PLAIN_MESSAGE_KEYS:
+            return None
+        digest.update(b"\x1e")
+        digest.update(message.get("role", "user").encode())
+        digest.update(b"\x1f")
+        digest.update(content.encode())
+    return digest.digest()
+
+
+@functools.cache
+def _optional_module(name: str) -> ModuleType | None:
+    # Resolved once per process so repeated activate() calls skip the import machinery.
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def _token_count(value: Any, default: int) -> int:
+    return value if isinstance(value, int) else default
+
+
+def _usage_tokens(response: Any, self_obj: Any, input_tokens: int) -> tuple[int, int, int]:
+    """(input, output, cached input) token counts reported for a call.
+
+    Falls back to the pre-call input estimate when the provider reports no usage.
+    """
+    usage = getattr(response, "usage", None)
+    if usage:
+        details = getattr(usage, "prompt_tokens_details", None)
+        return (
+            _token_count(getattr(usage, "prompt_tokens", None), input_tokens),
+            _token_count(getattr(usage, "completion_tokens", None), 0),
+            _token_count(getattr(details, "cached_tokens", None), 0),
+        )
+
+    # CrewAI completions return plain text; usage lives on the provider object.
+    usage_summary = getattr(self_obj, "get_token_usage_summary", None)
+    if callable(usage_summary):
+        token_usage = usage_summary()
+        if not isinstance(token_usage, dict):
+            model_dump = getattr(token_usage, "model_dump", None)
+            token_usage = model_dump() if callable(model_dump) else {}
+        return (
+            _token_count(token_usage.get("prompt_tokens"), input_tokens),
+            _token_count(token_usage.get("completion_tokens"), 0),
+            _token_count(token_usage.get("cached_prompt_tokens"), 0),
+        )
+
+    return input_tokens, 0, 0
+
+
+def _text_preview(content: Any) -> str | None:
+    if isinstance(content, str):
+        return content[:MAX_PREVIEW_LENGTH] or None
+    # Multimodal content is a list of parts; preview the first text part only.
+    if isinstance(content, list):
+        for part in content:
+            if isinstance(part, dict) and part.get("type") == "text":
+                return _text_preview(part.get("text"))
+    return None
+
+
+# litellm entry points: (name, resolver returning the owning object and attribute, is_async).
+_LITELLM_PATCHES: tuple[tuple[str, Callable[[Any], tuple[Any, str]], bool], ...] = (
+    ("completion", lambda m: (m, "completion"), False),
+    ("acompletion", lambda m: (m, "acompletion"), True),
+    ("chat.completions.create", lambda m: (m.chat.completions, "create"), False),
+    ("completion_with_functions", lambda m: (m, "completion_with_functions"), False),
+    ("acompletion_with_functions", lambda m: (m, "acompletion_with_functions"), True),
+)
+
+
+class _RequestRateLimiter:
+    """Token bucket allowing one second's worth of requests per burst."""
+
+    def __init__(self, rpm: int) -> None:
+        self._rate = rpm / 60.0
+        self._capacity = max(1.0, self._rate)
+        self._tokens = self._capacity
+        self._updated = monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self._rate)
 
 
 class LLMInterceptor:
@@ -16,14 +137,19 @@ class LLMInterceptor:
         token_counter: TokenCounter,
         pricing: PricingRegistry,
         trace_collector: TraceCollector,
+        capture_previews: bool = True,
     ):
         self.budget_tracker = budget_tracker
         self.token_counter = token_counter
         self.pricing = pricing
         self.trace_collector = trace_collector
+        self._capture_previews = capture_previews
+        self._unlimited = budget_tracker.unlimited
 
-        self._originals: dict[str, Callable[..., Any]] = {}
+        self._originals: list[tuple[Any, str, Callable[..., Any]]] = []
         self._active = False
+        self._token_cache: OrderedDict[bytes, int] = OrderedDict()
+        self._token_cache_lock = threading.Lock()
 
     def activate(self) -> None:
         if self._active:
@@ -36,47 +162,23 @@ class LLMInterceptor:
         self._active = True
 
     def _patch_litellm(self) -> None:
-        try:
-            import litellm
-        except ImportError:
+        litellm = _optional_module("litellm")
+        if litellm is None:
             return
 
-        methods_to_patch = [
-            "completion",
-            "acompletion",
-            "chat.completions.create",
-            "completion_with_functions",
-            "acompletion_with_functions",
-        ]
-
-        for method in methods_to_patch:
-            parts = method.split(".")
-            obj = litellm
-            for part in parts:
-                if hasattr(obj, part):
-                    obj = getattr(obj, part)
-                else:
-                    break
-            else:
-                self._originals[f"litellm.{method}"] = obj
-
-                if method == "chat.completions.create":
-                    key = f"litellm.{method}"
-                    litellm.chat.completions.create = self._make_patcher(key, obj)
-                elif method == "completion_with_functions":
-                    key = f"litellm.{method}"
-                    litellm.completion_with_functions = self._make_patcher(key, obj)
-                elif method == "acompletion_with_functions":
-                    key = f"litellm.{method}"
-                    litellm.acompletion_with_functions = self._make_patcher(key, obj)
-                else:
-                    key = f"litellm.{method}"
-                    setattr(litellm, method, self._make_patcher(key, obj))
+        for method, resolve, is_async in _LITELLM_PATCHES:
+            try:
+                owner, attr = resolve(litellm)
+                original = getattr(owner, attr)
+            except AttributeError:
+                continue
+
+            make_patcher = self._make_async_patcher if is_async else self._make_patcher
+            self._install(owner, attr, make_patcher(f"litellm.{method}", original), original)
 
     def _patch_openai(self) -> None:
-        try:
-            import openai
-        except ImportError:
+        openai = _optional_module("openai")
+        if openai is None:
             return
 
         # Patch sync OpenAI client
@@ -86,10 +188,13 @@ class LLMInterceptor:
             and hasattr(openai.OpenAI.chat, "completions")
             and hasattr(openai.OpenAI.chat.completions, "create")
         ):
-            original = openai.OpenAI.chat.completions.create
-            self._originals["openai.chat.completions.create"] = original
-            openai.OpenAI.chat.completions.create = self._make_patcher(
-                "openai.chat.completions.create", original
+            completions = openai.OpenAI.chat.completions
+            original = completions.create
+            self._install(
+                completions,
+                "create",
+                self._make_patcher("openai.chat.completions.create", original),
+                original,
             )
 
         # Patch async OpenAI client
@@ -99,130 +204,61 @@ class LLMInterceptor:
             and hasattr(openai.AsyncOpenAI.chat, "completions")
             and hasattr(openai.AsyncOpenAI.chat.completions, "create")
         ):
-            original = openai.AsyncOpenAI.chat.completions.create
-            self._originals["openai.async.chat.completions.create"] = original
-            openai.AsyncOpenAI.chat.completions.create = self._make_async_patcher(
-                "openai.async.chat.completions.create", original
+            completions = openai.AsyncOpenAI.chat.completions
+            original = completions.create
+            self._install(
+                completions,
+                "create",
+                self._make_async_patcher("openai.async.chat.completions.create", original),
+                original,
             )
 
     def _patch_crewai(self) -> None:
-        try:
-            from crewai.llms.providers.openai.completion import OpenAICompletion
-        except ImportError:
+        completion = _optional_module("crewai.llms.providers.openai.completion")
+        completion_cls = getattr(completion, "OpenAICompletion", None)
+        if completion_cls is None:
             return
 
-        interceptor = self
+        ref = weakref.ref(self)
 
-        if hasattr(OpenAICompletion, "_call_completions"):
-            original_call = OpenAICompletion._call_completions
-            self._originals["crewai._call_completions"] = original_call
+        if hasattr(completion_cls, "_call_completions"):
+            original_call = completion_cls._call_completions
 
             def patched(self: Any, *args: Any, **kwargs: Any) -> Any:
+                interceptor = ref()
+                if interceptor is None:
+                    return original_call(self, *args, **kwargs)
                 return interceptor._intercept_crewai_call(original_call, self, *args, **kwargs)
 
-            OpenAICompletion._call_completions = patched
+            self._install(completion_cls, "_call_completions", patched, original_call)
 
-        if hasattr(OpenAICompletion, "_acall_completions"):
-            original_acall = OpenAICompletion._acall_completions
-            self._originals["crewai._acall_completions"] = original_acall
+        if hasattr(completion_cls, "_acall_completions"):
+            original_acall = completion_cls._acall_completions
 
-            async def patched(self: Any, *args: Any, **kwargs: Any) -> Any:
+            async def apatched(self: Any, *args: Any, **kwargs: Any) -> Any:
+                interceptor = ref()
+                if interceptor is None:
+                    return await original_acall(self, *args, **kwargs)
                 return await interceptor._intercept_crewai_call_async(
                     original_acall, self, *args, **kwargs
                 )
 
-            OpenAICompletion._acall_completions = patched
+            self._install(completion_cls, "_acall_completions", apatched, original_acall)
 
     def _intercept_crewai_call(
         self, original: Callable[..., Any], self_obj: Any, *args: Any, **kwargs: Any
     ) -> Any:
-
         model = kwargs.get("model", getattr(self_obj, "model", None) or "gpt-4o-mini")
         messages = kwargs.get("messages", args[0] if args else [])
-
-        start_time = time.time()
-
-        try:
-            input_tokens = self.token_counter.count_messages(messages, model)
-        except Exception:
-            input_tokens = 0
-
-        estimated_output_tokens = input_tokens * 4
-
-        try:
-            estimated_input_cost = self.pricing.get_input_cost(model) * input_tokens / 1000
-            estimated_output_cost = (
-                self.pricing.get_output_cost(model) * estimated_output_tokens / 1000
-            )
-            estimated_total_cost = estimated_input_cost + estimated_output_cost
-        except Exception:
-            estimated_total_cost = 0
-
-        try:
-            self.budget_tracker.pre_check(estimated_total_cost, model)
-        except BudgetExceededError:
-            raise
-
-        span = Span(
-            run_id=self.budget_tracker.run_id,
-            span_type="llm_call",
-            model=model,
-            input_tokens=input_tokens,
-            input_preview=messages[0].get("content", "")[:200] if messages else None,
-        )
-        self.trace_collector.add_span(span)
+        span, rates, start_ns = self._prepare_span(model, messages)
 
         try:
             response = original(self_obj, *args, **kwargs)
         except Exception:
-            span.status = "error"
-            span.duration_ms = (time.time() - start_time) * 1000
+            self._fail_span(span, start_ns)
             raise
 
-        duration_ms = (time.time() - start_time) * 1000
-
-        try:
-            usage = getattr(response, "usage", None)
-            if usage:
-                output_tokens = getattr(usage, "completion_tokens", 0)
-                actual_input_tokens = getattr(usage, "prompt_tokens", input_tokens)
-            else:
-                usage_summary = getattr(self_obj, "get_token_usage_summary", None)
-                if usage_summary:
-                    token_usage = usage_summary()
-                    total_usage = (
-                        token_usage
-                        if isinstance(token_usage, dict)
-                        else token_usage.model_dump()
-                        if hasattr(token_usage, "model_dump")
-                        else {}
-                    )
-                    actual_input_tokens = total_usage.get("prompt_tokens", input_tokens)
-                    output_tokens = total_usage.get("completion_tokens", 0)
-                else:
-                    output_tokens = 0
-                    actual_input_tokens = input_tokens
-
-            cost_usd = self.pricing.estimate_call_cost(model, actual_input_tokens, output_tokens)
-
-            span.output_tokens = output_tokens
-            span.input_tokens = actual_input_tokens
-            span.cost_usd = cost_usd
-            span.duration_ms = duration_ms
-            span.status = "ok"
-
-            self.budget_tracker.record_call(
-                actual_input_tokens,
-                output_tokens,
-                model,
-                cost_usd,
-                duration_ms,
-            )
-        except BudgetExceededError:
-            raise
-        except Exception:
-            pass
-
+        self._finalize_span(span, rates, start_ns, response, self_obj)
         return response
 
     async def _intercept_crewai_call_async(
@@ -230,88 +266,172 @@ class LLMInterceptor:
     ) -> Any:
         model = kwargs.get("model", getattr(self_obj, "model", None) or "gpt-4o-mini")
         messages = kwargs.get("messages", args[0] if args else [])
-
-        start_time = time.time()
+        span, rates, start_ns = self._prepare_span(model, messages)
 
         try:
-            input_tokens = self.token_counter.count_messages(messages, model)
+            response = await original(self_obj, *args, **kwargs)
         except Exception:
-            input_tokens = 0
+            self._fail_span(span, start_ns)
+            raise
+
+        self._finalize_span(span, rates, start_ns, response, self_obj)
+        return response
 
-        estimated_output_tokens = input_tokens * 4
+    def _prepare_span(self, model: str, messages: Any) -> tuple[Span, _Rates | None, int]:
+        """Count input tokens, run the budget pre-check and open the call's span."""
+        start_ns = perf_counter_ns()
+        # One shared string per model name for cache keys, spans and budget records.
+        if type(model) is str:
+            model = sys.intern(model)
 
         try:
-            estimated_input_cost = self.pricing.get_input_cost(model) * input_tokens / 1000
-            estimated_output_cost = (
-                self.pricing.get_output_cost(model) * estimated_output_tokens / 1000
-            )
-            estimated_total_cost = estimated_input_cost + estimated_output_cost
+            input_tokens = self._count_cached(messages, model)
         except Exception:
-            estimated_total_cost = 0
+            input_tokens = 0
 
-        try:
-            self.budget_tracker.pre_check(estimated_total_cost, model)
-        except BudgetExceededError:
-            raise
+        rates = self._model_rates(model)
+        tracker = self.budget_tracker
+        # With max_usd=inf nothing can exceed the budget, so skip the estimate entirely.
+        if not self._unlimited:
+            if rates is not None:
+                estimated_total_cost = calc_cost(
+                    rates[0], rates[1], input_tokens, input_tokens * ESTIMATED_OUTPUT_MULTIPLIER
+                )
+            else:
+                estimated_total_cost = 0.0
+            tracker.pre_check(estimated_total_cost, model)
 
         span = Span(
-            run_id=self.budget_tracker.run_id,
-            span_type="llm_call",
+            run_id=tracker.run_id,
             model=model,
             input_tokens=input_tokens,
-            input_preview=messages[0].get("content", "")[:200] if messages else None,
+            input_preview=self._input_preview(messages),
         )
-        self.trace_collector.add_span(span)
+        self.trace_collector.enqueue(span)
+        return span, rates, start_ns
 
-        try:
-            response = await original(self_obj, *args, **kwargs)
-        except Exception:
-            span.status = "error"
-            span.duration_ms = (time.time() - start_time) * 1000
-            raise
+    def _fail_span(self, span: Span, start_ns: int) -> None:
+        span.status = STATUS_ERROR
+        span.duration_ms = (perf_counter_ns() - start_ns) / 1_000_000
+        self.trace_collector.write_span(span)
 
-        duration_ms = (time.time() - start_time) * 1000
+    def _finalize_span(
+        self,
+        span: Span,
+        rates: _Rates | None,
+        start_ns: int,
+        response: Any,
+        self_obj: Any = None,
+    ) -> None:
+        """Record actual usage and cost for a completed call and emit its span."""
+        duration_ms = (perf_counter_ns() - start_ns) / 1_000_000
+        model = span.model or "unknown"
+
+        input_tokens, output_tokens, cached_tokens = _usage_tokens(
+            response, self_obj, span.input_tokens or 0
+        )
+        # A model without pricing still counts as a turn, just at no cost.
+        cost_usd = (
+            calc_cost(rates[0], rates[1], input_tokens, output_tokens, cached_tokens, rates[2])
+            if rates is not None
+            else 0.0
+        )
+        output_preview = self._output_preview(response) if self._capture_previews else None
+
+        span.finalize(
+            output_tokens,
+            input_tokens,
+            cost_usd,
+            duration_ms,
+            output_preview=output_preview,
+            cached_tokens=cached_tokens,
+        )
 
+        self.budget_tracker.record_call(
+            input_tokens,
+            output_tokens,
+            model,
+            cost_usd,
+            duration_ms,
+        )
+        self.trace_collector.write_span(span)
+
+    def _count_cached(self, messages: list[dict[str, Any]], model: str) -> int:
+        # Agent loops resend the same system prompt and history; skip re-tokenizing them.
+        key = _messages_key(messages, model)
+        count_messages = self.token_counter.count_messages
+        if key is None:
+            return count_messages(messages, model)
+
+        cache = self._token_cache
+        lock = self._token_cache_lock
+        with lock:
+            cached = cache.get(key)
+            if cached is not None:
+                cache.move_to_end(key)
+                return cached
+
+        count = count_messages(messages, model)
+
+        with lock:
+            cache[key] = count
+            if len(cache) > TOKEN_CACHE_SIZE:
+                cache.popitem(last=False)
+        return count
+
+    def _input_preview(self, messages: Any) -> str | None:
+        if not self._capture_previews or not messages:
+            return None
+        first = messages[0]
+        return _text_preview(first.get("content")) if isinstance(first, dict) else None
+
+    @staticmethod
+    def _output_preview(response: Any) -> str | None:
+        choices = getattr(response, "choices", None)
+        if not isinstance(choices, list | tuple) or not choices:
+            return None
+        message = getattr(choices[0], "message", None)
+        return _text_preview(getattr(message, "content", None))
+
+    def _model_rates(self, model: str) -> _Rates | None:
+        """Per-1K prices for model, or None if it has no pricing."""
+        # Not memoized here: the registry caches lookups and clears them on registration.
         try:
-            output_tokens = getattr(response, "usage", None)
-            if output_tokens:
-                output_tokens = getattr(output_tokens, "completion_tokens", 0)
-                actual_input_tokens = getattr(output_tokens, "prompt_tokens", input_tokens)
-            else:
-                output_tokens = 0
-                actual_input_tokens = input_tokens
-
-            cost_usd = self.pricing.estimate_call_cost(model, actual_input_tokens, output_tokens)
-
-            span.output_tokens = output_tokens
-            span.input_tokens = actual_input_tokens
-            span.cost_usd = cost_usd
-            span.duration_ms = duration_ms
-            span.status = "ok"
-
-            self.budget_tracker.record_call(
-                actual_input_tokens,
-                output_tokens,
-                model,
-                cost_usd,
-                duration_ms,
-            )
-        except BudgetExceededError:
-            raise
-        except Exception:
-            pass
+            return self.pricing.get_rates(model)
+        except UnknownModelError:
+            return None
 
-        return response
+    def _install(
+        self,
+        owner: Any,
+        attr: str,
+        patched: Callable[..., Any],
+        original: Callable[..., Any],
+    ) -> None:
+        self._originals.append((owner, attr, original))
+        setattr(owner, attr, patched)
 
+    # Patchers hold only a weak reference to the interceptor, so an interceptor that is
+    # dropped without deactivate() can still be collected; its patchers then pass through.
     def _make_patcher(self, method: str, original: Callable[..., Any]) -> Callable[..., Any]:
+        ref = weakref.ref(self)
+
         def patched(*args: Any, **kwargs: Any) -> Any:
-            return self._intercept_call(original, *args, **kwargs)
+            interceptor = ref()
+            if interceptor is None:
+                return original(*args, **kwargs)
+            return interceptor._intercept_call(original, *args, **kwargs)
 
         return patched
 
     def _make_async_patcher(self, method: str, original: Callable[..., Any]) -> Callable[..., Any]:
+        ref = weakref.ref(self)
+
         async def patched(*args: Any, **kwargs: Any) -> Any:
-            return await self._intercept_call_async(original, *args, **kwargs)
+            interceptor = ref()
+            if interceptor is None:
+                return await original(*args, **kwargs)
+            return await interceptor._intercept_call_async(original, *args, **kwargs)
 
         return patched
 
@@ -319,36 +439,9 @@ class LLMInterceptor:
         if not self._active:
             return
 
-        try:
-            import litellm
-        except ImportError:
-            litellm = None
-
-        for method, original in self._originals.items():
-            if method.startswith("litellm."):
-                name = method[8:]
-                if name == "chat.completions.create" and litellm:
-                    litellm.chat.completions.create = original
-                elif name == "completion_with_functions" and litellm:
-                    litellm.completion_with_functions = original
-                elif name == "acompletion_with_functions" and litellm:
-                    litellm.acompletion_with_functions = original
-                elif litellm:
-                    setattr(litellm, name, original)
-            elif method == "openai.chat.completions.create":
-                try:
-                    import openai
-
-                    openai.OpenAI.chat.completions.create = original
-                except ImportError:
-                    pass
-            elif method == "openai.async.chat.completions.create":
-                try:
-                    import openai
-
-                    openai.AsyncOpenAI.chat.completions.create = original
-                except ImportError:
-                    pass
+        # Restore in reverse so an attribute patched twice ends up with its first original.
+        for owner, attr, original in reversed(self._originals):
+            setattr(owner, attr, original)
 
         self._originals.clear()
         self._active = False
@@ -367,83 +460,15 @@ class LLMInterceptor:
             raise TetherError("Interceptor not properly activated")
 
         model = kwargs.get("model", args[0] if args else "unknown")
-        messages = kwargs.get("messages", [])
-
-        start_time = time.time()
-
-        try:
-            input_tokens = self.token_counter.count_messages(messages, model)
-        except Exception:
-            input_tokens = 0
-
-        estimated_output_tokens = input_tokens * 4
-
-        try:
-            estimated_input_cost = self.pricing.get_input_cost(model) * input_tokens / 1000
-            estimated_output_cost = (
-                self.pricing.get_output_cost(model) * estimated_output_tokens / 1000
-            )
-            estimated_total_cost = estimated_input_cost + estimated_output_cost
-        except Exception:
-            estimated_total_cost = 0
-
-        try:
-            self.budget_tracker.pre_check(estimated_total_cost, model)
-        except BudgetExceededError:
-            raise
-
-        span = Span(
-            run_id=self.budget_tracker.run_id,
-            span_type="llm_call",
-            model=model,
-            input_tokens=input_tokens,
-            input_preview=messages[0].get("content", "")[:200] if messages else None,
-        )
-        self.trace_collector.add_span(span)
+        span, rates, start_ns = self._prepare_span(model, kwargs.get("messages", []))
 
         try:
             response = original_fn(*args, **kwargs)
         except Exception:
-            span.status = "error"
-            span.duration_ms = (time.time() - start_time) * 1000
+            self._fail_span(span, start_ns)
             raise
 
-        duration_ms = (time.time() - start_time) * 1000
-
-        try:
-            usage = getattr(response, "usage", None)
-            if usage:
-                output_tokens = getattr(usage, "completion_tokens", 0)
-                actual_input_tokens = getattr(usage, "prompt_tokens", input_tokens)
-            else:
-                output_tokens = 0
-                actual_input_tokens = input_tokens
-
-            cost_usd = self.pricing.estimate_call_cost(model, actual_input_tokens, output_tokens)
-
-            span.output_tokens = output_tokens
-            span.input_tokens = actual_input_tokens
-            span.cost_usd = cost_usd
-            span.duration_ms = duration_ms
-            span.status = "ok"
-
-            try:
-                content = response.choices[0].message.content if response.choices else ""
-                span.output_preview = content[:200] if content else None
-            except Exception:
-                pass
-
-            self.budget_tracker.record_call(
-                actual_input_tokens,
-                output_tokens,
-                model,
-                cost_usd,
-                duration_ms,
-            )
-
-        except Exception:
-            pass
-
+        self._finalize_span(span, rates, start_ns, response)
         return response
 
     async def _intercept_call_async(
@@ -453,84 +478,54 @@ class LLMInterceptor:
             raise TetherError("Interceptor not properly activated")
 
         model = kwargs.get("model", args[0] if args else "unknown")
-        messages = kwargs.get("messages", [])
-
-        start_time = time.time()
-
-        try:
-            input_tokens = self.token_counter.count_messages(messages, model)
-        except Exception:
-            input_tokens = 0
-
-        estimated_output_tokens = input_tokens * 4
-
-        try:
-            estimated_input_cost = self.pricing.get_input_cost(model) * input_tokens / 1000
-            estimated_output_cost = (
-                self.pricing.get_output_cost(model) * estimated_output_tokens / 1000
-            )
-            estimated_total_cost = estimated_input_cost + estimated_output_cost
-        except Exception:
-            estimated_total_cost = 0
-
-        try:
-            self.budget_tracker.pre_check(estimated_total_cost, model)
-        except BudgetExceededError:
-            raise
-
-        span = Span(
-            run_id=self.budget_tracker.run_id,
-            span_type="llm_call",
-            model=model,
-            input_tokens=input_tokens,
-            input_preview=messages[0].get("content", "")[:200] if messages else None,
-        )
-        self.trace_collector.add_span(span)
+        span, rates, start_ns = self._prepare_span(model, kwargs.get("messages", []))
 
         try:
             response = await original_fn(*args, **kwargs)
         except Exception:
-            span.status = "error"
-            span.duration_ms = (time.time() - start_time) * 1000
+            self._fail_span(span, start_ns)
             raise
 
-        duration_ms = (time.time() - start_time) * 1000
+        self._finalize_span(span, rates, start_ns, response)
+        return response
 
+    async def gather(
+        self,
+        coros: Iterable[Awaitable[T]],
+        max_concurrency: int = 32,
+        rpm: int | None = None,
+    ) -> list[T]:
+        """Await intercepted completions concurrently, like asyncio.gather.
+
+        Results keep the input order. At most max_concurrency calls are in
+        flight. Pass rpm to also rate limit starts to rpm requests per
+        minute; by default they are not limited. The budget is checked once
+        up front, so an exhausted run fails before any request is sent.
+        """
+        pending = list(coros)
         try:
-            usage = getattr(response, "usage", None)
-            if usage:
-                output_tokens = getattr(usage, "completion_tokens", 0)
-                actual_input_tokens = getattr(usage, "prompt_tokens", input_tokens)
-            else:
-                output_tokens = 0
-                actual_input_tokens = input_tokens
+            if max_concurrency < 1:
+                raise ValueError("max_concurrency must be at least 1")
+            if rpm is not None and rpm <= 0:
+                raise ValueError("rpm must be positive")
+            self.budget_tracker.pre_check(0.0)
+        except (ValueError, BudgetExceededError):
+            # Close the coroutines we will never await so they don't warn.
+            for aw in pending:
+                if inspect.iscoroutine(aw):
+                    aw.close()
+            raise
 
-            cost_usd = self.pricing.estimate_call_cost(model, actual_input_tokens, output_tokens)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limiter = _RequestRateLimiter(rpm) if rpm is not None else None
 
-            span.output_tokens = output_tokens
-            span.input_tokens = actual_input_tokens
-            span.cost_usd = cost_usd
-            span.duration_ms = duration_ms
-            span.status = "ok"
+        async def run(aw: Awaitable[T]) -> T:
+            async with semaphore:
+                if limiter is not None:
+                    await limiter.acquire()
+                return await aw
 
-            try:
-                content = response.choices[0].message.content if response.choices else ""
-                span.output_preview = content[:200] if content else None
-            except Exception:
-                pass
-
-            self.budget_tracker.record_call(
-                actual_input_tokens,
-                output_tokens,
-                model,
-                cost_usd,
-                duration_ms,
-            )
-
-        except Exception:
-            pass
-
-        return response
+        return list(await asyncio.gather(*(run(aw) for aw in pending)))
 
     def track_call(
         self,
@@ -550,11 +545,10 @@ class LLMInterceptor:
 
         span = Span(
             run_id=self.budget_tracker.run_id,
-            span_type="llm_call",
             model=model,
             input_tokens=input_tokens,
             output_tokens=output_tokens,
             cost_usd=cost_usd,
-            status="ok",
         )
-        self.trace_collector.add_span(span)
+        self.trace_collector.enqueue(span)
+        self.trace_collector.write_span(span)
@@ -1,6 +1,14 @@
+import functools
+import sys
+from collections.abc import Mapping, Sequence
+from types import MappingProxyType
+from typing import TypeVar
+
 from tetherai.exceptions import UnknownModelError
 
-BUNDLED_PRICING: dict[str, tuple[float, float]] = {
+_V = TypeVar("_V")
+
+_BUNDLED_PRICING: dict[str, tuple[float, float]] = {
     "gpt-4.1": (0.003, 0.012),
     "gpt-4.1-mini": (0.0008, 0.0032),
     "gpt-4.1-nano": (0.0002, 0.0008),
@@ -28,6 +36,17 @@ BUNDLED_PRICING: dict[str, tuple[float, float]] = {
     "mistral-large": (0.004, 0.012),
 }
 
+# Per-1K rate for prompt tokens served from the provider's prompt cache
+# (usage.prompt_tokens_details.cached_tokens). Models not listed bill cached
+# tokens at the full input rate.
+CACHED_INPUT_PRICING: dict[str, float] = {
+    "gpt-4.1": 0.00075,
+    "gpt-4.1-mini": 0.0002,
+    "gpt-4.1-nano": 0.00005,
+    "gpt-4o": 0.00125,
+    "gpt-4o-mini": 0.000075,
+}
+
 MODEL_ALIASES: dict[str, str] = {
     "gpt4o": "gpt-4o",
     "gpt-4o": "gpt-4o",
@@ -47,43 +66,136 @@ MODEL_ALIASES: dict[str, str] = {
 }
 
 
+def _lowercase_keys(table: dict[str, _V]) -> None:
+    entries = {sys.intern(name.lower()): value for name, value in table.items()}
+    table.clear()
+    table.update(entries)
+
+
+# Lookups normalize the requested model once; keep the tables canonical (and the
+# names interned, matching the interned model strings the interceptor passes) so
+# no further case folding is needed per probe.
+_lowercase_keys(_BUNDLED_PRICING)
+_lowercase_keys(CACHED_INPUT_PRICING)
+_lowercase_keys(MODEL_ALIASES)
+for _alias, _target in MODEL_ALIASES.items():
+    MODEL_ALIASES[_alias] = sys.intern(_target.lower())
+
+BUNDLED_PRICING: Mapping[str, tuple[float, float]] = MappingProxyType(_BUNDLED_PRICING)
+
+
+def calc_cost(
+    input_rate: float,
+    output_rate: float,
+    input_tokens: int,
+    output_tokens: int,
+    cached_tokens: int = 0,
+    cached_rate: float = 0.0,
+) -> float:
+    """USD cost of a call given per-1K-token rates; cached_tokens are part of input_tokens."""
+    cost = input_rate * input_tokens / 1000 + output_rate * output_tokens / 1000
+    if cached_tokens:
+        cost -= (input_rate - cached_rate) * cached_tokens / 1000
+    return cost
+
+
+def _build_price_table() -> dict[str, tuple[float, float]]:
+    """Bundled prices keyed by lowercase model name and by every alias."""
+    prices = dict(BUNDLED_PRICING)
+    for alias, target in MODEL_ALIASES.items():
+        if target in BUNDLED_PRICING:
+            prices[alias] = BUNDLED_PRICING[target]
+    return prices
+
+
+# Shared by every registry until it registers a custom model.
+_PRICE_TABLE: Mapping[str, tuple[float, float]] = MappingProxyType(_build_price_table())
+
+
 class PricingRegistry:
     def __init__(self, source: str = "bundled"):
         self._source = source
         self._custom_models: dict[str, tuple[float, float]] = {}
-        self._bundled = BUNDLED_PRICING.copy()
+        self._prices: Mapping[str, tuple[float, float]] = _PRICE_TABLE
+        # Keyed on the raw model string; per instance so custom registrations can clear it.
+        self._lookup = functools.lru_cache(maxsize=256)(self._lookup_uncached)
+        self._rates = functools.lru_cache(maxsize=256)(self._rates_uncached)
 
     def get_input_cost(self, model: str) -> float:
-        resolved = self.resolve_model_alias(model)
-        if resolved in self._custom_models:
-            return self._custom_models[resolved][0]
-        if resolved in self._bundled:
-            return self._bundled[resolved][0]
-        if self._source == "litellm":
-            return self._get_litellm_cost(model, "input")
-        raise UnknownModelError(f"Unknown model: {model}", model)
+        return self._lookup(model)[0]
 
     def get_output_cost(self, model: str) -> float:
-        resolved = self.resolve_model_alias(model)
-        if resolved in self._custom_models:
-            return self._custom_models[resolved][1]
-        if resolved in self._bundled:
-            return self._bundled[resolved][1]
-        if self._source == "litellm":
-            return self._get_litellm_cost(model, "output")
-        raise UnknownModelError(f"Unknown model: {model}", model)
+        return self._lookup(model)[1]
+
+    def get_cached_input_cost(self, model: str) -> float:
+        return self._rates(model)[2]
+
+    def get_rates(self, model: str) -> tuple[float, float, float]:
+        """Per-1K (input, output, cached input) prices for model in one lookup."""
+        return self._rates(model)
 
-    def estimate_call_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
-        input_cost = self.get_input_cost(model) * input_tokens / 1000
-        output_cost = self.get_output_cost(model) * output_tokens / 1000
-        return input_cost + output_cost
+    def estimate_call_cost(
+        self, model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0
+    ) -> float:
+        input_rate, output_rate = self._lookup(model)
+        return calc_cost(
+            input_rate,
+            output_rate,
+            input_tokens,
+            output_tokens,
+            cached_tokens,
+            self.get_cached_input_cost(model) if cached_tokens else 0.0,
+        )
+
+    def estimate_bulk_cost(
+        self,
+        models: Sequence[str],
+        input_tokens: Sequence[int],
+        output_tokens: Sequence[int],
+    ) -> list[float]:
+        """Per-call USD costs for parallel sequences, e.g. to re-cost a trace's spans."""
+        rates = {model: self._lookup(model) for model in set(models)}
+        return [
+            calc_cost(*rates[model], call_input, call_output)
+            for model, call_input, call_output in zip(
+                models, input_tokens, output_tokens, strict=True
+            )
+        ]
 
     def resolve_model_alias(self, model: str) -> str:
         normalized = model.lower().strip()
         return MODEL_ALIASES.get(normalized, model)
 
     def register_custom_model(self, model: str, input_cost: float, output_cost: float) -> None:
-        self._custom_models[model] = (input_cost, output_cost)
+        key = model.lower().strip()
+        rates = (input_cost, output_cost)
+        self._custom_models[key] = rates
+        prices = dict(self._prices)
+        prices[key] = rates
+        # Overriding a bundled model also overrides the aliases that point at it.
+        for alias, target in MODEL_ALIASES.items():
+            if target == key:
+                prices[alias] = rates
+        self._prices = prices
+        self._lookup.cache_clear()
+        self._rates.cache_clear()
+
+    def _lookup_uncached(self, model: str) -> tuple[float, float]:
+        """Per-1K (input, output) prices for model."""
+        prices = self._prices.get(model.lower().strip())
+        if prices is not None:
+            return prices
+        if self._source == "litellm":
+            return self._get_litellm_cost(model, "input"), self._get_litellm_cost(model, "output")
+        raise UnknownModelError(f"Unknown model: {model}", model)
+
+    def _rates_uncached(self, model: str) -> tuple[float, float, float]:
+        input_rate, output_rate = self._lookup(model)
+        key = model.lower().strip()
+        resolved = MODEL_ALIASES.get(key, key)
+        if resolved not in self._custom_models and resolved in CACHED_INPUT_PRICING:
+            return input_rate, output_rate, CACHED_INPUT_PRICING[resolved]
+        return input_rate, output_rate, input_rate
 
     def _get_litellm_cost(self, model: str, direction: str) -> float:
         try:
@@ -92,7 +204,11 @@ class PricingRegistry:
             raise UnknownModelError(
                 f"Unknown model: {model} (litellm not installed)", model
             ) from None
-        cost = litellm.cost_per_token(model, direction)  # type: ignore[arg-type,attr-defined]
+        try:
+            cost = litellm.cost_per_token(model, direction)  # type: ignore[arg-type,attr-defined]
+        except Exception as e:
+            # litellm signals an unmapped model with assorted exception types.
+            raise UnknownModelError(f"Unknown model: {model}", model) from e
         if isinstance(cost, tuple):
             return cost[0] if direction == "input" else cost[1]
         return cost
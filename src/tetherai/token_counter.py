@@ -1,12 +1,20 @@
+import functools
 import logging
+import os
 from typing import Any
 
+from tetherai.config import _resolve_auto_backend
 from tetherai.exceptions import TokenCountError
 
 logger = logging.getLogger(__name__)
 
 TOKENIZER_CACHE: dict[str, Any] = {}
 
+# Per encoding: tokens added by each role's ChatML prefix and suffix.
+ROLE_WRAP_TOKENS: dict[str, dict[str, int]] = {}
+
+PRELOAD_ENCODINGS = ("cl100k_base", "o200k_base")
+
 CHATML_FORMATTING = {
     "system": {"prefix": "<|im_start|>system\n", "suffix": "<|im_end|>\n"},
     "user": {"prefix": "<|im_start|>user\n", "suffix": "<|im_end|>\n"},
@@ -29,6 +37,18 @@ def _get_tiktoken_encoder(encoding_name: str = "cl100k_base") -> Any:
         raise TokenCountError(f"Failed to load tiktoken: {e}") from e
 
 
+def _role_wrap_tokens(encoder: Any) -> dict[str, int]:
+    wrap_tokens = ROLE_WRAP_TOKENS.get(encoder.name)
+    if wrap_tokens is None:
+        wrap_tokens = {
+            role: len(encoder.encode(formatting["prefix"]))
+            + len(encoder.encode(formatting["suffix"]))
+            for role, formatting in CHATML_FORMATTING.items()
+        }
+        ROLE_WRAP_TOKENS[encoder.name] = wrap_tokens
+    return wrap_tokens
+
+
 def _get_litellm_tokenizer(model: str) -> Any:
     try:
         import litellm
@@ -38,19 +58,21 @@ def _get_litellm_tokenizer(model: str) -> Any:
         raise TokenCountError("litellm not installed", model) from e
 
 
+# A prefix check rather than the bundled Claude names so unlisted Claude
+# models are still recognized.
+def _is_claude(model: str) -> bool:
+    return model.lower().startswith("claude-")
+
+
 class TokenCounter:
     def __init__(self, backend: str = "auto"):
         self._backend = backend
         self._tiktoken_encoder = None
         self._litellm_tokenizer = None
+        self._claude_warned: set[str] = set()
 
         if backend == "auto":
-            try:
-                import litellm  # noqa: F401
-
-                self._backend = "litellm"
-            except ImportError:
-                self._backend = "tiktoken"
+            self._backend = _resolve_auto_backend()
 
         if self._backend == "tiktoken":
             self._tiktoken_encoder = _get_tiktoken_encoder()
@@ -78,11 +100,12 @@ class TokenCounter:
             raise TokenCountError(f"Unknown backend: {self._backend}")
 
     def _count_with_tiktoken(self, text: str, model: str) -> int:
-        if model.startswith("claude-"):
-            logger.warning(
-                f"Using tiktoken for Claude model {model}. "
-                f"Token counts may be inaccurate (up to 12% error)."
-            )
+        if _is_claude(model):
+            self._warn_tiktoken_for_claude(model)
+
+        # Every single byte is a token in tiktoken's BPE vocabularies.
+        if len(text) == 1 and text.isascii():
+            return 1
 
         encoder = self._tiktoken_encoder
         if encoder is None:
@@ -90,16 +113,27 @@ class TokenCounter:
 
         return len(encoder.encode(text))
 
+    def _warn_tiktoken_for_claude(self, model: str) -> None:
+        # Once per model: agent loops count the same model on every turn.
+        if model in self._claude_warned or not logger.isEnabledFor(logging.WARNING):
+            return
+        self._claude_warned.add(model)
+        logger.warning(
+            "Using tiktoken for Claude model %s. "
+            "Token counts may be inaccurate (up to 12%% error).",
+            model,
+        )
+
     def _count_with_litellm(self, text: str, model: str) -> int:
         if self._litellm_tokenizer is None:
             self._litellm_tokenizer = _get_litellm_tokenizer(model)
 
-        if model.startswith("claude-"):
+        if _is_claude(model):
             try:
                 return self._litellm_tokenizer(model=model, text=text)  # type: ignore[no-any-return,misc]
             except Exception:
                 logger.warning(
-                    f"litellm token_counter failed for {model}, falling back to tiktoken"
+                    "litellm token_counter failed for %s, falling back to tiktoken", model
                 )
                 return self._count_with_tiktoken(text, model)
 
@@ -110,22 +144,24 @@ class TokenCounter:
         if encoder is None:
             encoder = _get_tiktoken_encoder()
 
-        if model.startswith("claude-"):
-            logger.warning(
-                f"Using tiktoken for Claude model {model}. Token counts may be inaccurate."
-            )
+        if _is_claude(model):
+            self._warn_tiktoken_for_claude(model)
 
-        total_tokens = 0
+        wrap_tokens = _role_wrap_tokens(encoder)
+        default_wrap = wrap_tokens["user"]
+        contents = []
+        total_tokens = 3
         for message in messages:
-            role = message.get("role", "user")
-            content = message.get("content", "")
+            total_tokens += wrap_tokens.get(message.get("role", "user"), default_wrap)
+            contents.append(str(message.get("content", "")))
 
-            formatting = CHATML_FORMATTING.get(role, CHATML_FORMATTING["user"])
-            formatted = f"{formatting['prefix']}{content}{formatting['suffix']}"
-            total_tokens += len(encoder.encode(formatted))
+        encode_batch = getattr(encoder, "encode_batch", None)
+        if encode_batch is not None and len(contents) > 1:
+            encoded = encode_batch(contents)
+        else:
+            encoded = [encoder.encode(content) for content in contents]
 
-        total_tokens += 3
-        return total_tokens
+        return total_tokens + sum(map(len, encoded))
 
     def _count_messages_with_litellm(self, messages: list[dict[str, str]], model: str) -> int:
         if self._litellm_tokenizer is None:
@@ -134,17 +170,34 @@ class TokenCounter:
         try:
             return self._litellm_tokenizer(model=model, messages=messages)  # type: ignore[no-any-return,misc]
         except Exception:
-            logger.warning(f"litellm token_counter failed for {model}, falling back to tiktoken")
+            logger.warning("litellm token_counter failed for %s, falling back to tiktoken", model)
             return self._count_messages_with_tiktoken(messages, model)
 
 
+@functools.lru_cache(maxsize=4)
+def _counter(backend: str) -> TokenCounter:
+    return TokenCounter(backend=backend)
+
+
 def count_tokens(text: str, model: str = "gpt-4o", backend: str = "auto") -> int:
-    counter = TokenCounter(backend=backend)
-    return counter.count_tokens(text, model)
+    return _counter(backend).count_tokens(text, model)
 
 
 def count_messages(
     messages: list[dict[str, str]], model: str = "gpt-4o", backend: str = "auto"
 ) -> int:
-    counter = TokenCounter(backend=backend)
-    return counter.count_messages(messages, model)
+    return _counter(backend).count_messages(messages, model)
+
+
+def preload_tiktoken(encodings: tuple[str, ...] = PRELOAD_ENCODINGS) -> None:
+    """Load tiktoken encodings up front so the first counted call does not pay for BPE parsing."""
+    for encoding_name in encodings:
+        try:
+            _get_tiktoken_encoder(encoding_name)
+        except TokenCountError as e:
+            logger.warning("Could not preload tiktoken encoding %s: %s", encoding_name, e)
+
+
+# Set TETHERAI_PRELOAD_TIKTOKEN=1 (e.g. in a Docker image) to load encoders at import.
+if os.environ.get("TETHERAI_PRELOAD_TIKTOKEN", "").lower() in ("1", "true", "yes"):
+    preload_tiktoken()
@@ -1,39 +1,84 @@
+import logging
+import sys
+import threading
+from collections import deque
+from collections.abc import Callable, Mapping
 from dataclasses import dataclass, field
 from datetime import datetime
+from secrets import token_hex
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
 MAX_PREVIEW_LENGTH = 200
+SPAN_BATCH_SIZE = 64
+
+SPAN_TYPE_LLM_CALL = "llm_call"
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
 
 
 def generate_id() -> str:
-    import uuid
+    return token_hex(8)
+
+
+def _plain_summary(summary: Mapping[str, Any]) -> dict[str, Any]:
+    # Budget summaries are read-only mappings (nested ones included); traces keep
+    # plain dicts so they serialize.
+    return {
+        key: dict(value) if isinstance(value, Mapping) else value for key, value in summary.items()
+    }
 
-    return uuid.uuid4().hex[:16]
 
+def _truncate(preview: str | None) -> str | None:
+    if preview is None or len(preview) <= MAX_PREVIEW_LENGTH:
+        return preview
+    return preview[:MAX_PREVIEW_LENGTH] + "..."
 
-@dataclass
+
+@dataclass(slots=True)
 class Span:
     span_id: str = field(default_factory=generate_id)
     parent_span_id: str | None = None
     run_id: str = ""
     timestamp: datetime = field(default_factory=datetime.now)
     duration_ms: float = 0.0
-    span_type: str = "llm_call"
+    span_type: str = SPAN_TYPE_LLM_CALL
     model: str | None = None
     input_tokens: int | None = None
     output_tokens: int | None = None
+    cached_tokens: int | None = None
     cost_usd: float | None = None
-    status: str = "ok"
+    status: str = STATUS_OK
     metadata: dict[str, Any] = field(default_factory=dict)
     input_preview: str | None = None
     output_preview: str | None = None
 
     def __post_init__(self) -> None:
-        if self.input_preview and len(self.input_preview) > MAX_PREVIEW_LENGTH:
-            self.input_preview = self.input_preview[:MAX_PREVIEW_LENGTH] + "..."
-
-        if self.output_preview and len(self.output_preview) > MAX_PREVIEW_LENGTH:
-            self.output_preview = self.output_preview[:MAX_PREVIEW_LENGTH] + "..."
+        # Exact str only: sys.intern rejects subclasses.
+        if type(self.model) is str:
+            self.model = sys.intern(self.model)
+
+        self.input_preview = _truncate(self.input_preview)
+        self.output_preview = _truncate(self.output_preview)
+
+    def finalize(
+        self,
+        output_tokens: int,
+        input_tokens: int,
+        cost_usd: float,
+        duration_ms: float,
+        status: str = STATUS_OK,
+        output_preview: str | None = None,
+        cached_tokens: int | None = None,
+    ) -> None:
+        self.output_tokens = output_tokens
+        self.input_tokens = input_tokens
+        self.cached_tokens = cached_tokens
+        self.cost_usd = cost_usd
+        self.duration_ms = duration_ms
+        self.status = status
+        self.output_preview = _truncate(output_preview)
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -46,6 +91,7 @@ class Span:
             "model": self.model,
             "input_tokens": self.input_tokens,
             "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
             "cost_usd": self.cost_usd,
             "status": self.status,
             "metadata": self.metadata,
@@ -54,7 +100,7 @@ class Span:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Trace:
     run_id: str
     spans: list[Span] = field(default_factory=list)
@@ -67,51 +113,110 @@ class Trace:
 
     @property
     def total_cost(self) -> float:
-        return sum(span.cost_usd or 0 for span in self.spans)
+        return self.totals()[0]
 
     @property
     def total_input_tokens(self) -> int:
-        return sum(span.input_tokens or 0 for span in self.spans)
+        return self.totals()[1]
 
     @property
     def total_output_tokens(self) -> int:
-        return sum(span.output_tokens or 0 for span in self.spans)
-
-    def to_dict(self) -> dict[str, Any]:
+        return self.totals()[2]
+
+    def totals(self) -> tuple[float, int, int]:
+        """(cost, input tokens, output tokens) summed over the spans in one pass.
+
+        Spans are attached when a call starts and filled in when it finishes, so
+        the totals are computed on read rather than accumulated in add_span.
+        """
+        cost = 0.0
+        input_tokens = 0
+        output_tokens = 0
+        for span in self.spans:
+            cost += span.cost_usd or 0
+            input_tokens += span.input_tokens or 0
+            output_tokens += span.output_tokens or 0
+        return cost, input_tokens, output_tokens
+
+    def summary_dict(self) -> dict[str, Any]:
+        """Everything in to_dict() except the spans."""
+        total_cost, total_input_tokens, total_output_tokens = self.totals()
         return {
             "run_id": self.run_id,
-            "spans": [span.to_dict() for span in self.spans],
             "budget_summary": self.budget_summary,
             "start_time": self.start_time.isoformat(),
             "end_time": self.end_time.isoformat() if self.end_time else None,
-            "total_cost": self.total_cost,
-            "total_input_tokens": self.total_input_tokens,
-            "total_output_tokens": self.total_output_tokens,
+            "total_cost": total_cost,
+            "total_input_tokens": total_input_tokens,
+            "total_output_tokens": total_output_tokens,
         }
 
+    def to_dict(self, span_data: Callable[[Span], Any] = Span.to_dict) -> dict[str, Any]:
+        # Merging keeps run_id first and the spans right after it.
+        return {
+            "run_id": self.run_id,
+            "spans": [span_data(span) for span in self.spans],
+        } | self.summary_dict()
+
 
 class TraceCollector:
-    def __init__(self) -> None:
+    def __init__(self, span_writer: Callable[[Span], None] | None = None) -> None:
         self._current_trace: Trace | None = None
+        self._span_writer = span_writer
+        self._pending: deque[Span] = deque()
+        self._drain_lock = threading.Lock()
 
-    def start_trace(self, run_id: str, budget_summary: dict[str, Any] | None = None) -> Trace:
+    def start_trace(self, run_id: str, budget_summary: Mapping[str, Any] | None = None) -> Trace:
+        self._drain()
         self._current_trace = Trace(
             run_id=run_id,
-            budget_summary=budget_summary or {},
+            budget_summary=_plain_summary(budget_summary) if budget_summary else {},
         )
         return self._current_trace
 
-    def end_trace(self) -> Trace | None:
+    def end_trace(self, budget_summary: Mapping[str, Any] | None = None) -> Trace | None:
+        self._drain()
         if self._current_trace:
             self._current_trace.end_time = datetime.now()
+            if budget_summary is not None:
+                self._current_trace.budget_summary = _plain_summary(budget_summary)
             trace = self._current_trace
             self._current_trace = None
             return trace
         return None
 
     def add_span(self, span: Span) -> None:
+        self._drain()
         if self._current_trace:
             self._current_trace.add_span(span)
 
+    def enqueue(self, span: Span) -> None:
+        # deque.append is atomic, so the call path never takes a lock; spans are
+        # moved onto the trace in batches or whenever the trace is read.
+        self._pending.append(span)
+        if len(self._pending) >= SPAN_BATCH_SIZE:
+            self._drain()
+
+    def _drain(self) -> None:
+        if not self._pending:
+            return
+        with self._drain_lock:
+            pending = self._pending
+            trace = self._current_trace
+            while pending:
+                span = pending.popleft()
+                if trace:
+                    trace.add_span(span)
+
+    def write_span(self, span: Span) -> None:
+        if self._span_writer is None:
+            return
+        # A broken exporter must not take down the call it is tracing.
+        try:
+            self._span_writer(span)
+        except Exception:
+            logger.warning("Failed to write span %s", span.span_id, exc_info=True)
+
     def get_current_trace(self) -> Trace | None:
+        self._drain()
         return self._current_trace
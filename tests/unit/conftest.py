@@ -0,0 +1,27 @@
+import pytest
+
+from tetherai.pricing import PricingRegistry
+from tetherai.token_counter import TokenCounter, preload_tiktoken
+
+
+@pytest.fixture(scope="session", autouse=True)
+def warm_tiktoken() -> None:
+    # Keeps BPE loading out of timed tests.
+    preload_tiktoken()
+
+
+@pytest.fixture(scope="session")
+def tiktoken_counter() -> TokenCounter:
+    return TokenCounter(backend="tiktoken")
+
+
+@pytest.fixture(scope="session")
+def litellm_counter() -> TokenCounter:
+    pytest.importorskip("litellm")
+    return TokenCounter(backend="litellm")
+
+
+@pytest.fixture(scope="session")
+def bundled_pricing() -> PricingRegistry:
+    # Shared: tests that register custom models build their own registry.
+    return PricingRegistry()
@@ -35,6 +35,24 @@ class TestBudgetTracker:
             tracker.pre_check(0.10)
         assert exc_info.value.run_id == "test-123"
 
+    def test_pre_check_far_from_limit_skips_lock(self):
+        tracker = BudgetTracker(run_id="test-123", max_usd=10.0)
+        tracker.record_call(100, 50, "gpt-4o", 1.0, 100.0)
+        with tracker._lock:
+            tracker.pre_check(0.5)
+
+    def test_pre_check_zero_estimate_near_limit_skips_lock(self):
+        tracker = BudgetTracker(run_id="test-123", max_usd=2.0)
+        tracker.record_call(100, 50, "gpt-4o", 1.99, 100.0)
+        with tracker._lock:
+            tracker.pre_check(0.0)
+
+    def test_pre_check_zero_estimate_blocks_when_exhausted(self):
+        tracker = BudgetTracker(run_id="test-123", max_usd=2.0)
+        tracker.record_call(100, 50, "gpt-4o", 2.0, 100.0)
+        with pytest.raises(BudgetExceededError):
+            tracker.pre_check(0.0)
+
     def test_pre_check_blocks_exact_boundary(self):
         tracker = BudgetTracker(run_id="test-123", max_usd=2.0)
         tracker.record_call(100, 50, "gpt-4o", 2.0, 100.0)
@@ -87,7 +105,48 @@ class TestBudgetTracker:
         assert summary["spent_usd"] == 0.50
         assert summary["remaining_usd"] == 9.5
         assert summary["turn_count"] == 1
-        assert len(summary["calls"]) == 1
+        assert summary["total_input_tokens"] == 100
+        assert summary["total_output_tokens"] == 50
+        assert summary["calls_by_model"] == {"gpt-4o": 1}
+
+    def test_get_summary_aggregates_across_calls(self):
+        tracker = BudgetTracker(run_id="test-123", max_usd=10.0)
+        tracker.record_call(100, 50, "gpt-4o", 0.50, 100.0)
+        tracker.record_call(200, 10, "gpt-4o-mini", 0.01, 50.0)
+        tracker.record_call(300, 20, "gpt-4o", 0.50, 25.0)
+
+        summary = tracker.get_summary()
+        assert summary["total_input_tokens"] == 600
+        assert summary["total_output_tokens"] == 80
+        assert summary["total_duration_ms"] == 175.0
+        assert summary["calls_by_model"] == {"gpt-4o": 2, "gpt-4o-mini": 1}
+
+    def test_get_summary_is_cached_until_next_call(self):
+        tracker = BudgetTracker(run_id="test-123", max_usd=10.0)
+        tracker.record_call(100, 50, "gpt-4o", 0.50, 100.0)
+
+        summary = tracker.get_summary()
+        assert tracker.get_summary() is summary
+
+        tracker.record_call(100, 50, "gpt-4o", 0.50, 100.0)
+        refreshed = tracker.get_summary()
+        assert refreshed is not summary
+        assert refreshed["turn_count"] == 2
+        assert summary["turn_count"] == 1
+
+    def test_get_summary_is_read_only(self):
+        tracker = BudgetTracker(run_id="test-123", max_usd=10.0)
+        summary = tracker.get_summary()
+        with pytest.raises(TypeError):
+            summary["spent_usd"] = 5.0
+
+    def test_get_summary_calls_by_model_is_read_only(self):
+        tracker = BudgetTracker(run_id="test-123", max_usd=10.0)
+        tracker.record_call(100, 50, "gpt-4o", 0.50, 100.0)
+
+        with pytest.raises(TypeError):
+            tracker.get_summary()["calls_by_model"]["gpt-4o"] = 99
+        assert tracker.get_summary()["calls_by_model"] == {"gpt-4o": 1}
 
     def test_negative_cost_rejected(self):
         tracker = BudgetTracker(run_id="test-123", max_usd=10.0)
@@ -123,3 +182,7 @@ class TestBudgetTrackerProperties:
         tracker = BudgetTracker(run_id="test", max_usd=1.0)
         tracker.record_call(100, 50, "gpt-4o", 1.0, 100.0)
         assert tracker.is_exceeded is True
+
+    def test_unlimited_only_for_infinite_budget(self):
+        assert BudgetTracker(run_id="test", max_usd=float("inf")).unlimited is True
+        assert BudgetTracker(run_id="test", max_usd=1e9).unlimited is False
@@ -1,10 +1,13 @@
 import asyncio
+import json
 import threading
 from unittest.mock import Mock
 
 import pytest
 
 from tetherai.circuit_breaker import enforce_budget
+from tetherai.exceptions import BudgetExceededError
+from tetherai.exporter import get_exporter
 
 
 def make_mock_llm_call(cost: float = 0.01):
@@ -65,6 +68,84 @@ class TestEnforceBudgetDecorator:
         with pytest.raises(ValueError):
             function_that_raises()
 
+    def test_on_exceed_return_none_swallows_budget_error(self):
+        @enforce_budget(max_usd=2.0, on_exceed="return_none", trace_export="none")
+        def over_budget():
+            raise BudgetExceededError("over", "run-x", 2.0, 2.5, "gpt-4o")
+
+        assert over_budget() is None
+
+    def test_on_exceed_return_none_async(self):
+        @enforce_budget(max_usd=2.0, on_exceed="return_none", trace_export="none")
+        async def over_budget():
+            raise BudgetExceededError("over", "run-x", 2.0, 2.5, "gpt-4o")
+
+        assert asyncio.run(over_budget()) is None
+
+    def test_budget_error_raised_by_default(self):
+        @enforce_budget(max_usd=2.0, trace_export="none")
+        def over_budget():
+            raise BudgetExceededError("over", "run-x", 2.0, 2.5, "gpt-4o")
+
+        with pytest.raises(BudgetExceededError):
+            over_budget()
+
+
+class TestEnforceBudgetConfig:
+    @pytest.mark.parametrize(("env_value", "expected"), [("true", "test"), ("false", None)])
+    def test_capture_previews_env_reaches_spans(self, monkeypatch, tmp_path, env_value, expected):
+        litellm = pytest.importorskip("litellm")
+        monkeypatch.setenv("TETHERAI_CAPTURE_PREVIEWS", env_value)
+        monkeypatch.setenv("TETHERAI_TRACE_EXPORT_PATH", str(tmp_path))
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=make_mock_llm_call()))
+
+        @enforce_budget(max_usd=2.0, trace_export="json")
+        def call_llm():
+            litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+
+        call_llm()
+
+        (path,) = tmp_path.glob("*.json")
+        span = json.loads(path.read_bytes())["spans"][0]
+        assert span["input_preview"] == expected
+        assert span["output_preview"] == (expected and "test response")
+
+    @pytest.mark.parametrize("trace_export", ["jsonl", "jsonl_mp"])
+    def test_jsonl_run_ends_with_summary_record(self, monkeypatch, tmp_path, trace_export):
+        litellm = pytest.importorskip("litellm")
+        monkeypatch.setenv("TETHERAI_TRACE_EXPORT_PATH", str(tmp_path))
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=make_mock_llm_call()))
+
+        @enforce_budget(max_usd=2.0, trace_export=trace_export)
+        def call_llm():
+            litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+
+        call_llm()
+
+        (path,) = tmp_path.glob("*.ndjson")
+        span, summary = map(json.loads, path.read_text().splitlines())
+        assert span["model"] == "gpt-4o"
+        assert summary["type"] == "trace_summary"
+        assert summary["budget_summary"]["turn_count"] == 1
+        assert summary["total_output_tokens"] == 5
+
+    def test_jsonl_mp_runs_survive_exporter_close(self, monkeypatch, tmp_path):
+        litellm = pytest.importorskip("litellm")
+        monkeypatch.setenv("TETHERAI_TRACE_EXPORT_PATH", str(tmp_path))
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=make_mock_llm_call()))
+
+        @enforce_budget(max_usd=2.0, trace_export="jsonl_mp")
+        def call_llm():
+            litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+
+        call_llm()
+        get_exporter("jsonl_mp", str(tmp_path)).close()
+        call_llm()
+
+        paths = list(tmp_path.glob("*.ndjson"))
+        assert len(paths) == 2
+        assert all(len(path.read_text().splitlines()) == 2 for path in paths)
+
 
 class TestEnforceBudgetConcurrent:
     def test_concurrent_decorated_functions_isolated(self):
@@ -21,6 +21,11 @@ class TestConfig:
         config = TetherConfig.from_env()
         assert config.default_budget_usd == 5.0
 
+    def test_capture_previews_env_flag(self, monkeypatch):
+        assert TetherConfig().capture_previews is True
+        monkeypatch.setenv("TETHERAI_CAPTURE_PREVIEWS", "false")
+        assert TetherConfig.from_env().capture_previews is False
+
     def test_kwargs_beat_env_vars(self, monkeypatch):
         monkeypatch.setenv("TETHERAI_DEFAULT_BUDGET_USD", "5.0")
         config = TetherConfig(default_budget_usd=8.0)
@@ -61,6 +66,23 @@ class TestConfigAutoBackend:
             config = TetherConfig(token_counter_backend="auto")
             assert config.resolve_backend() == "tiktoken"
 
+    def test_auto_backend_probe_is_memoized(self):
+        from tetherai.config import _resolve_auto_backend
+
+        _resolve_auto_backend.cache_clear()
+        TetherConfig._resolve_backend("auto")
+        TetherConfig._resolve_backend("auto")
+        assert _resolve_auto_backend.cache_info().misses == 1
+
+    def test_token_counter_shares_auto_probe(self):
+        from tetherai.config import _resolve_auto_backend
+        from tetherai.token_counter import TokenCounter
+
+        _resolve_auto_backend.cache_clear()
+        counter = TokenCounter(backend="auto")
+        assert counter._backend == TetherConfig._resolve_backend("auto")
+        assert _resolve_auto_backend.cache_info().misses == 1
+
     def test_kwargs_override_collector_url(self):
         config = TetherConfig(collector_url="http://localhost:8080")
         assert config.collector_url == "http://localhost:8080"
@@ -80,3 +102,14 @@ class TestLoadConfig:
         monkeypatch.setenv("TETHERAI_DEFAULT_BUDGET_USD", "7.5")
         config = load_config()
         assert config.default_budget_usd == 7.5
+
+    def test_load_config_without_overrides_is_cached(self, monkeypatch):
+        monkeypatch.delenv("TETHERAI_LOG_LEVEL", raising=False)
+        assert load_config() is load_config()
+
+        monkeypatch.setenv("TETHERAI_LOG_LEVEL", "ERROR")
+        assert load_config().log_level == "ERROR"
+
+    def test_load_config_overrides_are_validated(self):
+        with pytest.raises(ValueError, match="non-negative"):
+            load_config(default_budget_usd=-1.0)
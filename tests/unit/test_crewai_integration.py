@@ -1,8 +1,32 @@
+import json
 from unittest.mock import Mock, patch
 
 import pytest
 
 from tetherai.crewai.integration import ProtectedCrew, protect_crew
+from tetherai.exceptions import BudgetExceededError
+
+
+class StubCrew:
+    """Stands in for a crewai Crew whose agents call the LLM through litellm."""
+
+    def kickoff(self, prompt: str = "test") -> str:
+        import litellm
+
+        response = litellm.completion(
+            model="gpt-4o", messages=[{"role": "user", "content": prompt}]
+        )
+        return response.choices[0].message.content
+
+
+@pytest.fixture
+def mock_litellm(monkeypatch):
+    litellm = pytest.importorskip("litellm")
+    response = Mock()
+    response.choices = [Mock(message=Mock(content="crew result"))]
+    response.usage = Mock(prompt_tokens=10, completion_tokens=5)
+    monkeypatch.setattr(litellm, "completion", Mock(return_value=response))
+    return litellm
 
 
 class TestCrewAIIntegration:
@@ -56,3 +80,21 @@ class TestCrewAIIntegration:
 
         assert protected.agents == mock_crew.agents
         assert protected.tasks == mock_crew.tasks
+
+    def test_protected_crew_kickoff_writes_trace(self, monkeypatch, tmp_path, mock_litellm):
+        monkeypatch.setenv("TETHERAI_TRACE_EXPORT_PATH", str(tmp_path))
+        protected = ProtectedCrew(StubCrew(), max_usd=2.0, trace_export="json")
+
+        assert protected.kickoff() == "crew result"
+
+        (path,) = tmp_path.glob("*.json")
+        (span,) = json.loads(path.read_bytes())["spans"]
+        assert span["model"] == "gpt-4o"
+
+    def test_protected_crew_kickoff_enforces_budget(self, mock_litellm):
+        protected = ProtectedCrew(StubCrew(), max_usd=0.000001, trace_export="none")
+
+        with pytest.raises(BudgetExceededError):
+            protected.kickoff()
+
+        mock_litellm.completion.assert_not_called()
@@ -1,5 +1,7 @@
 import pickle
 
+from pytest import mark
+
 from tetherai.exceptions import (
     BudgetExceededError,
     TetherError,
@@ -7,6 +9,51 @@ from tetherai.exceptions import (
     TurnLimitError,
 )
 
+METADATA_CASES = [
+    (
+        BudgetExceededError,
+        {
+            "run_id": "abc123",
+            "budget_usd": 2.0,
+            "spent_usd": 2.34,
+            "last_model": "gpt-4o",
+            "trace_url": "https://tetherai.com/traces/abc123",
+        },
+    ),
+    (TurnLimitError, {"run_id": "xyz789", "max_turns": 10, "current_turn": 15}),
+]
+METADATA_IDS = ["budget_exceeded", "turn_limit"]
+
+PICKLE_CASES = [
+    (
+        BudgetExceededError(
+            message="Budget exceeded",
+            run_id="abc123",
+            budget_usd=2.0,
+            spent_usd=2.34,
+            last_model="gpt-4o",
+        ),
+        {"run_id": "abc123", "spent_usd": 2.34},
+    ),
+    (
+        TurnLimitError(
+            message="Turn limit exceeded",
+            run_id="xyz789",
+            max_turns=10,
+            current_turn=15,
+        ),
+        {"run_id": "xyz789", "max_turns": 10},
+    ),
+    (
+        TokenCountError(
+            message="Token counting failed",
+            model="unknown-model",
+        ),
+        {"model": "unknown-model"},
+    ),
+]
+PICKLE_IDS = ["budget_exceeded", "turn_limit", "token_count"]
+
 
 class TestExceptions:
     def test_budget_exceeded_is_tether_error(self):
@@ -19,21 +66,6 @@ class TestExceptions:
         )
         assert isinstance(err, TetherError)
 
-    def test_budget_exceeded_carries_metadata(self):
-        err = BudgetExceededError(
-            message="Budget exceeded",
-            run_id="abc123",
-            budget_usd=2.0,
-            spent_usd=2.34,
-            last_model="gpt-4o",
-            trace_url="https://tetherai.com/traces/abc123",
-        )
-        assert err.run_id == "abc123"
-        assert err.budget_usd == 2.0
-        assert err.spent_usd == 2.34
-        assert err.last_model == "gpt-4o"
-        assert err.trace_url == "https://tetherai.com/traces/abc123"
-
     def test_budget_exceeded_str_repr(self):
         err = BudgetExceededError(
             message="Budget exceeded",
@@ -55,49 +87,29 @@ class TestExceptions:
         )
         assert isinstance(err, TetherError)
 
-    def test_turn_limit_carries_metadata(self):
-        err = TurnLimitError(
-            message="Turn limit exceeded",
-            run_id="xyz789",
-            max_turns=10,
-            current_turn=15,
-        )
-        assert err.run_id == "xyz789"
-        assert err.max_turns == 10
-        assert err.current_turn == 15
+    @mark.parametrize(("cls", "kwargs"), METADATA_CASES, ids=METADATA_IDS)
+    def test_exception_carries_metadata(self, cls, kwargs):
+        err = cls(message="Limit exceeded", **kwargs)
 
-    def test_exceptions_are_picklable(self):
-        err1 = BudgetExceededError(
-            message="Budget exceeded",
-            run_id="abc123",
-            budget_usd=2.0,
-            spent_usd=2.34,
-            last_model="gpt-4o",
-        )
-        err2 = TurnLimitError(
-            message="Turn limit exceeded",
-            run_id="xyz789",
-            max_turns=10,
-            current_turn=15,
-        )
-        err3 = TokenCountError(
-            message="Token counting failed",
-            model="unknown-model",
-        )
+        for name, value in kwargs.items():
+            assert getattr(err, name) == value
+
+    @mark.parametrize(("err", "attrs"), PICKLE_CASES, ids=PICKLE_IDS)
+    def test_exceptions_are_picklable(self, err, attrs):
+        unpickled = pickle.loads(pickle.dumps(err, protocol=pickle.HIGHEST_PROTOCOL))
 
-        pickled1 = pickle.dumps(err1)
-        pickled2 = pickle.dumps(err2)
-        pickled3 = pickle.dumps(err3)
+        assert type(unpickled) is type(err)
+        for name, value in attrs.items():
+            assert getattr(unpickled, name) == value
 
-        unpickled1 = pickle.loads(pickled1)
-        unpickled2 = pickle.loads(pickled2)
-        unpickled3 = pickle.loads(pickled3)
+    def test_exceptions_pickle_in_one_stream(self):
+        errors = tuple(err for err, _ in PICKLE_CASES)
+        blob = pickle.dumps(errors, protocol=pickle.HIGHEST_PROTOCOL)
 
-        assert unpickled1.run_id == "abc123"
-        assert unpickled1.spent_usd == 2.34
-        assert unpickled2.run_id == "xyz789"
-        assert unpickled2.max_turns == 10
-        assert unpickled3.model == "unknown-model"
+        for unpickled, (err, attrs) in zip(pickle.loads(blob), PICKLE_CASES, strict=True):
+            assert type(unpickled) is type(err)
+            for name, value in attrs.items():
+                assert getattr(unpickled, name) == value
 
     def test_token_count_error_carries_model(self):
         err = TokenCountError(
@@ -1,21 +1,33 @@
+import gzip
 import json
-import os
-import tempfile
+import queue
+import threading
+import time
+import zlib
+from collections import OrderedDict
 from pathlib import Path
 
 import pytest
 
+from tetherai import exporter as exporter_module
 from tetherai.exporter import (
+    TRACE_SUMMARY_TYPE,
     ConsoleExporter,
     JSONFileExporter,
+    JSONLFileExporter,
     NoopExporter,
+    ProcessJSONLExporter,
     get_exporter,
 )
 from tetherai.trace import Span, Trace
 
 
+def _hang(*args):
+    time.sleep(60)
+
+
 class TestConsoleExporter:
-    def test_console_exporter_writes_to_stderr(self, capsys):
+    def test_console_exporter_writes_to_stderr(self, capfd):
         trace = Trace(run_id="test-123")
         trace.add_span(
             Span(
@@ -30,63 +42,282 @@ class TestConsoleExporter:
         exporter = ConsoleExporter()
         exporter.export(trace)
 
-        captured = capsys.readouterr()
+        captured = capfd.readouterr()
         assert "test-123" in captured.err
         assert "gpt-4o" in captured.err
 
+    def test_console_exporter_lists_every_span(self, capfd):
+        trace = Trace(run_id="test-123")
+        trace.add_span(Span(run_id="test-123", model="gpt-4o", cost_usd=0.01))
+        trace.add_span(Span(run_id="test-123", model=None, cost_usd=None))
+
+        ConsoleExporter().export(trace)
+
+        err = capfd.readouterr().err
+        assert "Spans: 2" in err
+        assert "[1] llm_call: gpt-4o" in err
+        assert "[2] llm_call: N/A" in err
+        assert err.count("Cost: $") == 2
+
 
 class TestJSONFileExporter:
-    def test_json_exporter_creates_file(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            exporter = JSONFileExporter(output_dir=tmpdir)
+    def test_json_exporter_writes_one_file_per_trace(self, tmp_path):
+        exporter = JSONFileExporter(output_dir=str(tmp_path))
+
+        single = Trace(run_id="run-456")
+        single.add_span(Span(run_id="run-456", model="gpt-4o", cost_usd=0.01))
+        full = Trace(run_id="run-full")
+        full.add_span(Span(run_id="run-full", model="gpt-4o", cost_usd=0.01))
+        full.add_span(Span(run_id="run-full", model="gpt-4o-mini", cost_usd=0.001))
+
+        exporter.export(single)
+        exporter.export(full)
+
+        results = {p.stem: json.loads(p.read_bytes()) for p in tmp_path.glob("*.json")}
+        assert results.keys() == {"run-456", "run-full"}
+        assert {run_id: len(data["spans"]) for run_id, data in results.items()} == {
+            "run-456": 1,
+            "run-full": 2,
+        }
+        assert all(data["run_id"] == run_id for run_id, data in results.items())
+
+    def test_json_file_path_created_if_missing(self, tmp_path):
+        nested_path = tmp_path / "nested" / "traces"
+        exporter = JSONFileExporter(output_dir=str(nested_path))
+
+        trace = Trace(run_id="run-nested")
+        exporter.export(trace)
+
+        assert (nested_path / "run-nested.json").exists()
+
+    def test_json_exporter_is_compact_by_default(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("TETHERAI_TRACE_PRETTY", raising=False)
+        exporter = JSONFileExporter(output_dir=str(tmp_path))
+
+        trace = Trace(run_id="run-compact")
+        trace.add_span(Span(run_id="run-compact", model="gpt-4o", input_preview="héllo"))
+
+        exporter.export(trace)
+
+        text = (tmp_path / "run-compact.json").read_text(encoding="utf-8")
+        assert "\n" not in text
+        assert '"run_id":"run-compact"' in text
+        assert "héllo" in text
+
+    def test_json_exporter_pretty_from_env(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("TETHERAI_TRACE_PRETTY", "1")
+        exporter = JSONFileExporter(output_dir=str(tmp_path))
+        exporter.export(Trace(run_id="run-pretty"))
+
+        text = (tmp_path / "run-pretty.json").read_text()
+        assert '\n  "run_id": "run-pretty"' in text
+
+    def test_json_exporter_without_orjson(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(exporter_module, "_HAS_ORJSON", False)
+        exporter = JSONFileExporter(output_dir=str(tmp_path), pretty=False)
+
+        trace = Trace(run_id="run-stdlib")
+        trace.add_span(Span(run_id="run-stdlib", model="gpt-4o", cost_usd=0.01))
+
+        exporter.export(trace)
+
+        data = json.loads((tmp_path / "run-stdlib.json").read_bytes())
+        assert data["spans"][0]["model"] == "gpt-4o"
+
+    def test_json_exporter_gzip_output(self, tmp_path):
+        exporter = JSONFileExporter(output_dir=str(tmp_path), compress=True)
+
+        trace = Trace(run_id="run-gz")
+        trace.add_span(Span(run_id="run-gz", model="gpt-4o", cost_usd=0.01))
+
+        exporter.export(trace)
+
+        filepath = tmp_path / "run-gz.json.gz"
+        with gzip.open(filepath, "rt") as f:
+            data = json.load(f)
+        assert data["run_id"] == "run-gz"
+        assert len(data["spans"]) == 1
+        assert not (tmp_path / "run-gz.json").exists()
+
+    def test_json_exporter_gzip_from_env(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("TETHERAI_TRACE_GZIP", "1")
+        exporter = JSONFileExporter(output_dir=str(tmp_path))
+        assert exporter.compress is True
 
-            trace = Trace(run_id="run-456")
-            trace.add_span(Span(run_id="run-456", model="gpt-4o", cost_usd=0.01))
 
-            exporter.export(trace)
+class TestJSONLFileExporter:
+    def test_jsonl_exporter_writes_one_span_per_line(self, tmp_path):
+        exporter = JSONLFileExporter(output_dir=str(tmp_path), compress=False)
 
-            filepath = Path(tmpdir) / "run-456.json"
-            assert filepath.exists()
+        trace = Trace(run_id="run-lines")
+        trace.add_span(Span(run_id="run-lines", model="gpt-4o", cost_usd=0.01))
+        trace.add_span(Span(run_id="run-lines", model="gpt-4o-mini", cost_usd=0.001))
 
-    def test_json_exporter_output_is_valid_json(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            exporter = JSONFileExporter(output_dir=tmpdir)
+        exporter.export(trace)
+
+        *spans, summary = map(json.loads, (tmp_path / "run-lines.ndjson").read_text().splitlines())
+        assert [span["model"] for span in spans] == ["gpt-4o", "gpt-4o-mini"]
+        assert summary["type"] == TRACE_SUMMARY_TYPE
+        assert summary["total_cost"] == pytest.approx(0.011)
+
+    def test_jsonl_finish_appends_summary_after_streamed_spans(self, tmp_path):
+        exporter = JSONLFileExporter(output_dir=str(tmp_path), compress=False)
+        trace = Trace(run_id="run-stream", budget_summary={"spent_usd": 0.02})
+        trace.add_span(Span(run_id="run-stream", model="gpt-4o", input_tokens=12))
+        trace.add_span(Span(run_id="run-stream", model="gpt-4o-mini", input_tokens=3))
+
+        for span in trace.spans:
+            exporter.write_span(span)
+        exporter.finish(trace)
+
+        lines = (tmp_path / "run-stream.ndjson").read_text().splitlines()
+        summary = json.loads(lines[-1])
+        assert len(lines) == 3
+        assert "spans" not in summary
+        assert summary["budget_summary"] == {"spent_usd": 0.02}
+        assert summary["total_input_tokens"] == 15
+        assert not exporter._files
+
+    @pytest.mark.parametrize("has_orjson", [True, False])
+    def test_jsonl_span_line_matches_to_dict(self, monkeypatch, has_orjson, tmp_path):
+        if has_orjson:
+            pytest.importorskip("orjson")
+        monkeypatch.setattr(exporter_module, "_HAS_ORJSON", has_orjson)
+        exporter = JSONLFileExporter(output_dir=str(tmp_path), compress=False)
+        span = Span(run_id="run-shape", model="gpt-4o", metadata={"step": 1})
+
+        exporter.write_span(span)
+        exporter.close()
+
+        line = (tmp_path / "run-shape.ndjson").read_text()
+        assert json.loads(line) == span.to_dict()
+
+    @pytest.mark.parametrize("has_orjson", [True, False])
+    def test_jsonl_serializes_unusual_metadata(self, monkeypatch, has_orjson, tmp_path):
+        if has_orjson:
+            pytest.importorskip("orjson")
+        monkeypatch.setattr(exporter_module, "_HAS_ORJSON", has_orjson)
+        exporter = JSONLFileExporter(output_dir=str(tmp_path), compress=False)
+        metadata = {1: "int key", "big": 2**70, "path": Path("a")}
+        span = Span(run_id="run-odd", model="gpt-4o", metadata=metadata)
+
+        exporter.write_span(span)
+        exporter.close()
+
+        line = json.loads((tmp_path / "run-odd.ndjson").read_text())
+        assert line["metadata"] == {"1": "int key", "big": 2**70, "path": "a"}
+
+    def test_jsonl_gzip_run_is_one_member(self, tmp_path):
+        exporter = JSONLFileExporter(output_dir=str(tmp_path), compress=True)
+        trace = Trace(run_id="run-gz")
+
+        exporter.write_span(Span(run_id="run-gz", model="gpt-4o"))
+        exporter.write_span(Span(run_id="run-gz", model="gpt-4o-mini"))
+        exporter.finish(trace)
+
+        member = zlib.decompressobj(wbits=31)
+        lines = member.decompress((tmp_path / "run-gz.ndjson.gz").read_bytes()).splitlines()
+        assert len(lines) == 3
+        assert member.eof
+        assert member.unused_data == b""
+
+
+class TestProcessJSONLExporter:
+    def test_spans_written_by_writer_process(self, tmp_path):
+        exporter = ProcessJSONLExporter(output_dir=str(tmp_path), compress=False)
+
+        exporter.write_span(Span(run_id="run-mp", model="gpt-4o"))
+        exporter.write_span(Span(run_id="run-mp", model="gpt-4o-mini"))
+        exporter.close()
+
+        lines = (tmp_path / "run-mp.ndjson").read_text().splitlines()
+        assert [json.loads(line)["model"] for line in lines] == ["gpt-4o", "gpt-4o-mini"]
+        assert exporter.dropped == 0
+
+    def test_finish_waits_for_run_to_be_flushed(self, tmp_path):
+        exporter = ProcessJSONLExporter(output_dir=str(tmp_path), compress=False)
+        trace = Trace(run_id="run-flush")
+        trace.add_span(Span(run_id="run-flush", model="gpt-4o"))
+
+        exporter.write_span(trace.spans[0])
+        exporter.finish(trace)
+
+        try:
+            lines = (tmp_path / "run-flush.ndjson").read_text().splitlines()
+            assert json.loads(lines[-1])["type"] == TRACE_SUMMARY_TYPE
+            assert len(lines) == 2
+        finally:
+            exporter.close()
+
+    def test_full_queue_drops_span(self, tmp_path):
+        exporter = ProcessJSONLExporter(output_dir=str(tmp_path), compress=False)
+        exporter._queue = queue.Queue(maxsize=1)
+        exporter._queue.put({})
+
+        exporter.write_span(Span(run_id="run-full"))
+
+        assert exporter.dropped == 1
+
+    def test_finish_waits_for_room_instead_of_dropping_summary(self, tmp_path):
+        exporter = ProcessJSONLExporter(output_dir=str(tmp_path), compress=False, flush_timeout=0.5)
+        exporter._queue = queue.Queue(maxsize=1)
+        exporter._queue.put({})
+        threading.Timer(0.05, exporter._queue.get).start()
+
+        exporter.finish(Trace(run_id="run-full"))
 
-            trace = Trace(run_id="run-789")
-            trace.add_span(Span(run_id="run-789", model="gpt-4o", cost_usd=0.01))
+        assert exporter.dropped == 0
+        assert exporter._queue.get_nowait()["type"] == TRACE_SUMMARY_TYPE
+        assert not exporter._waiting
 
-            exporter.export(trace)
+    def test_late_ack_is_discarded(self, tmp_path):
+        exporter = ProcessJSONLExporter(output_dir=str(tmp_path), compress=False)
+        acks = queue.Queue()
+        acks.put("run-late")
+        acks.put(None)
 
-            filepath = Path(tmpdir) / "run-789.json"
-            with open(filepath) as f:
-                data = json.load(f)
-            assert "run_id" in data
-            assert len(data["spans"]) == 1
+        exporter._read_acks(acks)
 
-    def test_json_exporter_contains_all_spans(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            exporter = JSONFileExporter(output_dir=tmpdir)
+        assert not exporter._flushed
 
-            trace = Trace(run_id="run-full")
-            trace.add_span(Span(run_id="run-full", model="gpt-4o", cost_usd=0.01))
-            trace.add_span(Span(run_id="run-full", model="gpt-4o-mini", cost_usd=0.001))
+    def test_drops_counted_across_threads(self, tmp_path):
+        exporter = ProcessJSONLExporter(output_dir=str(tmp_path), compress=False)
+        exporter._queue = queue.Queue(maxsize=1)
+        exporter._queue.put({})
+        span = Span(run_id="run-full")
 
-            exporter.export(trace)
+        def write_many():
+            for _ in range(500):
+                exporter.write_span(span)
 
-            filepath = Path(tmpdir) / "run-full.json"
-            with open(filepath) as f:
-                data = json.load(f)
-            assert len(data["spans"]) == 2
+        threads = [threading.Thread(target=write_many) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
 
-    def test_json_file_path_created_if_missing(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            nested_path = os.path.join(tmpdir, "nested", "traces")
-            exporter = JSONFileExporter(output_dir=nested_path)
+        assert exporter.dropped == 4000
 
-            trace = Trace(run_id="run-nested")
-            exporter.export(trace)
+    def test_write_after_close_is_dropped(self, tmp_path):
+        exporter = ProcessJSONLExporter(output_dir=str(tmp_path), compress=False)
+        exporter.write_span(Span(run_id="run-closed"))
+        exporter.close()
 
-            assert Path(nested_path, "run-nested.json").exists()
+        exporter.write_span(Span(run_id="run-closed"))
+        exporter.finish(Trace(run_id="run-closed"))
+
+        assert exporter._process is None
+        assert exporter.dropped == 2
+
+    def test_close_terminates_hung_writer(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(exporter_module, "_write_spans", _hang)
+        exporter = ProcessJSONLExporter(output_dir=str(tmp_path), compress=False)
+        exporter.write_span(Span(run_id="run-hung"))
+        process = exporter._process
+
+        exporter.close(timeout=0.1)
+
+        assert not process.is_alive()
 
 
 class TestNoopExporter:
@@ -97,17 +328,15 @@ class TestNoopExporter:
 
 
 class TestExporterHandlesEmptyTrace:
-    def test_exporter_handles_empty_trace(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            exporter = JSONFileExporter(output_dir=tmpdir)
-            trace = Trace(run_id="empty-run")
-            exporter.export(trace)
+    def test_exporter_handles_empty_trace(self, tmp_path):
+        exporter = JSONFileExporter(output_dir=str(tmp_path))
+        trace = Trace(run_id="empty-run")
+        exporter.export(trace)
 
-            filepath = Path(tmpdir) / "empty-run.json"
-            with open(filepath) as f:
-                data = json.load(f)
-            assert data["run_id"] == "empty-run"
-            assert data["spans"] == []
+        filepath = tmp_path / "empty-run.json"
+        data = json.loads(filepath.read_bytes())
+        assert data["run_id"] == "empty-run"
+        assert data["spans"] == []
 
 
 class TestGetExporter:
@@ -115,10 +344,42 @@ class TestGetExporter:
         exporter = get_exporter("console")
         assert isinstance(exporter, ConsoleExporter)
 
-    def test_get_json_exporter(self):
-        exporter = get_exporter("json", output_dir="/tmp/test")
+    def test_get_json_exporter(self, tmp_path):
+        exporter = get_exporter("json", output_dir=str(tmp_path))
         assert isinstance(exporter, JSONFileExporter)
 
+    def test_get_jsonl_exporter(self, tmp_path):
+        exporter = get_exporter("jsonl", output_dir=str(tmp_path))
+        assert isinstance(exporter, JSONLFileExporter)
+
+    def test_get_jsonl_mp_exporter_is_shared(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("TETHERAI_TRACE_GZIP", raising=False)
+        exporter = get_exporter("jsonl_mp", output_dir=str(tmp_path))
+        assert isinstance(exporter, ProcessJSONLExporter)
+        assert get_exporter("jsonl_mp", output_dir=str(tmp_path)) is exporter
+
+        monkeypatch.setenv("TETHERAI_TRACE_GZIP", "1")
+        compressed = get_exporter("jsonl_mp", output_dir=str(tmp_path))
+        assert compressed is not exporter
+        assert compressed.compress is True
+
+    def test_closed_jsonl_mp_exporter_is_replaced(self, tmp_path):
+        exporter = get_exporter("jsonl_mp", output_dir=str(tmp_path))
+        exporter.close()
+
+        replacement = get_exporter("jsonl_mp", output_dir=str(tmp_path))
+        assert replacement is not exporter
+        assert replacement._closed is False
+
+    def test_evicted_jsonl_mp_exporter_is_closed(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(exporter_module, "_PROCESS_EXPORTERS", OrderedDict())
+        monkeypatch.setattr(exporter_module, "MAX_PROCESS_EXPORTERS", 1)
+
+        first = get_exporter("jsonl_mp", output_dir=str(tmp_path / "a"))
+        get_exporter("jsonl_mp", output_dir=str(tmp_path / "b"))
+
+        assert first._closed is True
+
     def test_get_noop_exporter(self):
         exporter = get_exporter("none")
         assert isinstance(exporter, NoopExporter)
@@ -0,0 +1,39 @@
+import inspect
+import subprocess
+import sys
+
+import pytest
+
+import tetherai
+from tetherai.circuit_breaker import enforce_budget
+from tetherai.exceptions import BudgetExceededError
+
+
+class TestLazyImports:
+    def test_import_does_not_load_circuit_breaker(self):
+        code = "import sys, tetherai; print('tetherai.circuit_breaker' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "False"
+
+    def test_lazy_attributes_resolve(self):
+        assert tetherai.enforce_budget is enforce_budget
+        assert tetherai.BudgetExceededError is BudgetExceededError
+
+    def test_unknown_attribute_raises(self):
+        with pytest.raises(AttributeError):
+            tetherai.does_not_exist  # noqa: B018
+
+    def test_tether_namespace_enforce_budget(self):
+        @tetherai.tether.enforce_budget(max_usd=2.0, trace_export="none")
+        def my_function():
+            return "hello"
+
+        assert my_function() == "hello"
+
+    def test_tether_enforce_budget_keeps_decorator_signature(self):
+        proxy = inspect.signature(tetherai.tether.enforce_budget)
+        assert list(proxy.parameters.values()) == list(
+            inspect.signature(enforce_budget).parameters.values()
+        )
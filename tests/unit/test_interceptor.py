@@ -1,39 +1,59 @@
+import asyncio
+import gc
+import sys
+import weakref
+from dataclasses import dataclass
+from types import SimpleNamespace
 from unittest.mock import Mock, patch
 
-import pytest
+from pytest import approx, fixture, mark, raises
 
 from tetherai.budget import BudgetTracker
-from tetherai.exceptions import BudgetExceededError, TetherError
-from tetherai.interceptor import LLMInterceptor
+from tetherai.exceptions import BudgetExceededError, TetherError, TurnLimitError
+from tetherai.interceptor import LLMInterceptor, _optional_module
 from tetherai.pricing import PricingRegistry
-from tetherai.token_counter import TokenCounter
 from tetherai.trace import TraceCollector
 
+try:
+    import litellm
+except ImportError:
+    litellm = None
 
+requires_litellm = mark.skipif(litellm is None, reason="litellm not installed")
+
+
+@fixture
+def interceptor_stack(request, monkeypatch, tiktoken_counter, bundled_pricing):
+    # Depending on monkeypatch makes this teardown run before litellm is restored.
+    # Parametrize indirectly to override max_usd.
+    tracker = BudgetTracker(run_id="test", max_usd=getattr(request, "param", 10.0))
+    collector = TraceCollector()
+    collector.start_trace("test")
+    interceptor = LLMInterceptor(tracker, tiktoken_counter, bundled_pricing, collector)
+    yield interceptor, tracker, collector
+    if interceptor._active:
+        interceptor.deactivate()
+
+
+@dataclass
 class MockResponse:
-    def __init__(self, content="test", prompt_tokens=10, completion_tokens=5):
-        self.content = content
-        self.choices = [Mock(message=Mock(content=content))]
-        self.usage = Mock(
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
+    content: str = "test"
+    prompt_tokens: int = 10
+    completion_tokens: int = 5
+
+    def __post_init__(self):
+        # The interceptor only reads these attributes, so plain namespaces stand in for Mocks.
+        self.choices = [SimpleNamespace(message=SimpleNamespace(content=self.content))]
+        self.usage = SimpleNamespace(
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
         )
 
 
 class TestLLMInterceptor:
-    def test_activate_patches_litellm(self):
-        try:
-            import litellm
-        except ImportError:
-            pytest.skip("litellm not installed")
-
-        tracker = BudgetTracker(run_id="test", max_usd=10.0)
-        counter = TokenCounter(backend="tiktoken")
-        pricing = PricingRegistry()
-        collector = TraceCollector()
-        collector.start_trace("test")
-
-        interceptor = LLMInterceptor(tracker, counter, pricing, collector)
+    @requires_litellm
+    def test_activate_patches_litellm(self, interceptor_stack):
+        interceptor, _, _ = interceptor_stack
 
         original = litellm.completion
         interceptor.activate()
@@ -41,193 +61,441 @@ class TestLLMInterceptor:
 
         interceptor.deactivate()
 
-    def test_deactivate_restores_litellm(self):
-        try:
-            import litellm
-        except ImportError:
-            pytest.skip("litellm not installed")
-
-        tracker = BudgetTracker(run_id="test", max_usd=10.0)
-        counter = TokenCounter(backend="tiktoken")
-        pricing = PricingRegistry()
-        collector = TraceCollector()
-        collector.start_trace("test")
+    @requires_litellm
+    def test_deactivate_restores_litellm(self, interceptor_stack):
+        interceptor, _, _ = interceptor_stack
 
         original = litellm.completion
-
-        interceptor = LLMInterceptor(tracker, counter, pricing, collector)
         interceptor.activate()
         interceptor.deactivate()
 
         assert litellm.completion is original
 
-    def test_context_manager_cleanup(self):
-        try:
-            import litellm
-        except ImportError:
-            pytest.skip("litellm not installed")
-
+    @requires_litellm
+    def test_dropped_interceptor_is_collected_and_patch_passes_through(
+        self, monkeypatch, tiktoken_counter, bundled_pricing
+    ):
         tracker = BudgetTracker(run_id="test", max_usd=10.0)
-        counter = TokenCounter(backend="tiktoken")
-        pricing = PricingRegistry()
         collector = TraceCollector()
-        collector.start_trace("test")
+
+        mock_completion = Mock(return_value=MockResponse())
+        monkeypatch.setattr(litellm, "completion", mock_completion)
+        interceptor = LLMInterceptor(tracker, tiktoken_counter, bundled_pricing, collector)
+        interceptor.activate()
+        ref = weakref.ref(interceptor)
+        del interceptor
+        gc.collect()
+
+        assert ref() is None
+        litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+
+        mock_completion.assert_called_once()
+        assert tracker.turn_count == 0
+
+    @requires_litellm
+    def test_context_manager_cleanup(self, interceptor_stack):
+        interceptor, _, _ = interceptor_stack
 
         original = litellm.completion
 
-        with LLMInterceptor(tracker, counter, pricing, collector):
+        with interceptor:
             pass
 
         assert litellm.completion is original
 
-    def test_pre_check_runs_before_network_call(self):
-        try:
-            import litellm
-        except ImportError:
-            pytest.skip("litellm not installed")
-
-        tracker = BudgetTracker(run_id="test", max_usd=0.0001)
-        counter = TokenCounter(backend="tiktoken")
-        pricing = PricingRegistry()
-        collector = TraceCollector()
-        collector.start_trace("test")
+    @requires_litellm
+    @mark.parametrize("interceptor_stack", [0.0001], indirect=True)
+    def test_pre_check_runs_before_network_call(self, monkeypatch, interceptor_stack):
+        interceptor, _, _ = interceptor_stack
 
         mock_completion = Mock(return_value=MockResponse())
 
-        with patch.object(litellm, "completion", mock_completion):
-            interceptor = LLMInterceptor(tracker, counter, pricing, collector)
-            interceptor.activate()
-
-            with pytest.raises(BudgetExceededError):
-                litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+        monkeypatch.setattr(litellm, "completion", mock_completion)
+        interceptor.activate()
 
-            mock_completion.assert_not_called()
+        with raises(BudgetExceededError):
+            litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
 
-    def test_actual_usage_recorded_after_call(self):
-        try:
-            import litellm
-        except ImportError:
-            pytest.skip("litellm not installed")
+        mock_completion.assert_not_called()
 
-        tracker = BudgetTracker(run_id="test", max_usd=10.0)
-        counter = TokenCounter(backend="tiktoken")
-        pricing = PricingRegistry()
-        collector = TraceCollector()
-        collector.start_trace("test")
+    @requires_litellm
+    def test_actual_usage_recorded_after_call(self, monkeypatch, interceptor_stack):
+        interceptor, tracker, _ = interceptor_stack
 
         mock_response = MockResponse(prompt_tokens=100, completion_tokens=50)
 
-        with patch.object(litellm, "completion", return_value=mock_response):
-            interceptor = LLMInterceptor(tracker, counter, pricing, collector)
-            interceptor.activate()
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=mock_response))
+        interceptor.activate()
 
-            litellm.completion(
-                model="gpt-4o", messages=[{"role": "user", "content": "test message"}]
-            )
+        litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test message"}])
+        interceptor.deactivate()
 
         assert tracker.spent_usd > 0
 
-    def test_response_object_unchanged(self):
-        try:
-            import litellm
-        except ImportError:
-            pytest.skip("litellm not installed")
-
-        tracker = BudgetTracker(run_id="test", max_usd=10.0)
-        counter = TokenCounter(backend="tiktoken")
-        pricing = PricingRegistry()
-        collector = TraceCollector()
-        collector.start_trace("test")
+    @requires_litellm
+    def test_response_object_unchanged(self, monkeypatch, interceptor_stack):
+        interceptor, _, _ = interceptor_stack
 
         mock_response = MockResponse(content="Hello!")
 
-        with patch.object(litellm, "completion", return_value=mock_response):
-            interceptor = LLMInterceptor(tracker, counter, pricing, collector)
-            interceptor.activate()
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=mock_response))
+        interceptor.activate()
 
-            result = litellm.completion(
-                model="gpt-4o", messages=[{"role": "user", "content": "test"}]
-            )
+        result = litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+        interceptor.deactivate()
 
         assert result.choices[0].message.content == "Hello!"
 
-    def test_trace_span_emitted(self):
-        try:
-            import litellm
-        except ImportError:
-            pytest.skip("litellm not installed")
-
-        tracker = BudgetTracker(run_id="test", max_usd=10.0)
-        counter = TokenCounter(backend="tiktoken")
-        pricing = PricingRegistry()
-        collector = TraceCollector()
-        collector.start_trace("test")
+    @requires_litellm
+    def test_trace_span_emitted(self, monkeypatch, interceptor_stack):
+        interceptor, _, collector = interceptor_stack
 
         mock_response = MockResponse()
 
-        with patch.object(litellm, "completion", return_value=mock_response):
-            interceptor = LLMInterceptor(tracker, counter, pricing, collector)
-            interceptor.activate()
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=mock_response))
+        interceptor.activate()
 
-            litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+        litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+        interceptor.deactivate()
 
         trace = collector.get_current_trace()
         assert trace is not None
         assert len(trace.spans) == 1
         assert trace.spans[0].model == "gpt-4o"
 
-    def test_no_litellm_manual_tracking(self):
+    @requires_litellm
+    def test_span_writer_failure_does_not_skip_budgeting(
+        self, monkeypatch, tiktoken_counter, bundled_pricing
+    ):
+        tracker = BudgetTracker(run_id="test", max_usd=10.0)
+        collector = TraceCollector(span_writer=Mock(side_effect=OSError("disk full")))
+        collector.start_trace("test")
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=MockResponse(content="ok")))
+
+        with LLMInterceptor(tracker, tiktoken_counter, bundled_pricing, collector):
+            result = litellm.completion(
+                model="gpt-4o", messages=[{"role": "user", "content": "test"}]
+            )
+
+        assert result.choices[0].message.content == "ok"
+        assert tracker.spent_usd > 0
+        assert tracker.turn_count == 1
+
+    @requires_litellm
+    def test_multimodal_input_preview_uses_first_text_part(self, monkeypatch, interceptor_stack):
+        interceptor, _, collector = interceptor_stack
+
+        content = [
+            {"type": "image_url", "image_url": {"url": "https://example.com/cat.png"}},
+            {"type": "text", "text": "describe this"},
+        ]
+
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=MockResponse()))
+        interceptor.activate()
+        litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": content}])
+        interceptor.deactivate()
+
+        span = collector.get_current_trace().spans[0]
+        assert span.input_preview == "describe this"
+        assert span.output_preview == "test"
+
+    @requires_litellm
+    def test_previews_skipped_when_disabled(self, monkeypatch, tiktoken_counter, bundled_pricing):
         tracker = BudgetTracker(run_id="test", max_usd=10.0)
-        counter = TokenCounter(backend="tiktoken")
+        collector = TraceCollector()
+        collector.start_trace("test")
+
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=MockResponse()))
+        interceptor = LLMInterceptor(
+            tracker, tiktoken_counter, bundled_pricing, collector, capture_previews=False
+        )
+        interceptor.activate()
+        litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+        interceptor.deactivate()
+
+        span = collector.get_current_trace().spans[0]
+        assert span.input_preview is None
+        assert span.output_preview is None
+
+    def test_span_model_name_is_interned(self, interceptor_stack):
+        interceptor, _, _ = interceptor_stack
+
+        model = "".join(["gpt-4o", "-mini"])
+        span, _, _ = interceptor._prepare_span(model, [])
+
+        assert span.model is sys.intern("gpt-4o-mini")
+
+    def test_unlimited_budget_skips_pre_check(self, tiktoken_counter, bundled_pricing):
+        tracker = BudgetTracker(run_id="test", max_usd=float("inf"))
+        collector = TraceCollector()
+        interceptor = LLMInterceptor(tracker, tiktoken_counter, bundled_pricing, collector)
+
+        with patch.object(tracker, "pre_check") as pre_check:
+            interceptor._prepare_span("gpt-4o", [{"role": "user", "content": "hi"}])
+
+        pre_check.assert_not_called()
+
+    @requires_litellm
+    def test_rates_follow_custom_registration(self, monkeypatch, tiktoken_counter):
         pricing = PricingRegistry()
+        tracker = BudgetTracker(run_id="test", max_usd=10.0)
         collector = TraceCollector()
         collector.start_trace("test")
+        interceptor = LLMInterceptor(tracker, tiktoken_counter, pricing, collector)
+
+        monkeypatch.setattr(
+            litellm,
+            "completion",
+            Mock(return_value=MockResponse(prompt_tokens=1000, completion_tokens=1000)),
+        )
+        interceptor.activate()
+        messages = [{"role": "user", "content": "hi"}]
+
+        litellm.completion(model="my-local-model", messages=messages)
+        pricing.register_custom_model("my-local-model", 0.001, 0.002)
+        litellm.completion(model="my-local-model", messages=messages)
+        interceptor.deactivate()
+
+        assert tracker.spent_usd == approx(0.003)
+
+    def test_repeated_prompt_tokenized_once(self, interceptor_stack, tiktoken_counter):
+        interceptor, _, _ = interceptor_stack
+
+        messages = [
+            {"role": "system", "content": "You are helpful."},
+            {"role": "user", "content": "hi"},
+        ]
+        with patch.object(
+            tiktoken_counter, "count_messages", wraps=tiktoken_counter.count_messages
+        ) as count:
+            first = interceptor._count_cached(messages, "gpt-4o")
+            second = interceptor._count_cached([dict(m) for m in messages], "gpt-4o")
+            interceptor._count_cached(messages, "gpt-4o-mini")
+
+        assert first == second
+        assert count.call_count == 2
+
+    def test_non_plain_messages_not_cached(self, interceptor_stack, tiktoken_counter):
+        interceptor, _, _ = interceptor_stack
+
+        messages = [{"role": "user", "content": "hi", "name": "bob"}]
+        with patch.object(tiktoken_counter, "count_messages", return_value=7) as count:
+            interceptor._count_cached(messages, "gpt-4o")
+            interceptor._count_cached(messages, "gpt-4o")
+
+        assert count.call_count == 2
+
+    def test_no_litellm_manual_tracking(self, interceptor_stack):
+        interceptor, tracker, _ = interceptor_stack
 
-        interceptor = LLMInterceptor(tracker, counter, pricing, collector)
         interceptor.track_call("gpt-4o", 100, 50)
 
         assert tracker.spent_usd > 0
 
-    def test_exception_from_llm_still_recorded(self):
-        try:
-            import litellm
-        except ImportError:
-            pytest.skip("litellm not installed")
+    @requires_litellm
+    def test_turn_limit_raised_after_call(self, monkeypatch, tiktoken_counter, bundled_pricing):
+        tracker = BudgetTracker(run_id="test", max_usd=10.0, max_turns=1)
+        collector = TraceCollector()
+        collector.start_trace("test")
 
-        tracker = BudgetTracker(run_id="test", max_usd=10.0)
-        counter = TokenCounter(backend="tiktoken")
-        pricing = PricingRegistry()
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=MockResponse()))
+        interceptor = LLMInterceptor(tracker, tiktoken_counter, bundled_pricing, collector)
+        interceptor.activate()
+        messages = [{"role": "user", "content": "test"}]
+        litellm.completion(model="gpt-4o", messages=messages)
+
+        with raises(TurnLimitError):
+            litellm.completion(model="gpt-4o", messages=messages)
+
+        interceptor.deactivate()
+
+        assert tracker.turn_count == 1
+
+    @requires_litellm
+    def test_unpriced_model_still_counts_turns(
+        self, monkeypatch, tiktoken_counter, bundled_pricing
+    ):
+        tracker = BudgetTracker(run_id="test", max_usd=10.0, max_turns=1)
         collector = TraceCollector()
         collector.start_trace("test")
 
-        with patch.object(litellm, "completion", side_effect=Exception("Rate limited")):
-            interceptor = LLMInterceptor(tracker, counter, pricing, collector)
-            interceptor.activate()
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=MockResponse()))
+        interceptor = LLMInterceptor(tracker, tiktoken_counter, bundled_pricing, collector)
+        interceptor.activate()
+        messages = [{"role": "user", "content": "test"}]
+        litellm.completion(model="my-local-model", messages=messages)
+
+        with raises(TurnLimitError):
+            litellm.completion(model="my-local-model", messages=messages)
+
+        interceptor.deactivate()
 
-            with pytest.raises(Exception):  # noqa: B017
-                litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+        span = collector.get_current_trace().spans[0]
+        assert span.cost_usd == 0.0
+        assert span.output_tokens == 5
+        assert span.status == "ok"
+        assert tracker.get_summary()["calls_by_model"] == {"my-local-model": 1}
+
+    @requires_litellm
+    def test_cached_prompt_tokens_discounted(self, monkeypatch, interceptor_stack, bundled_pricing):
+        interceptor, tracker, collector = interceptor_stack
+
+        response = MockResponse(prompt_tokens=1000, completion_tokens=100)
+        response.usage.prompt_tokens_details = SimpleNamespace(cached_tokens=600)
+
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=response))
+        interceptor.activate()
+        litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+        interceptor.deactivate()
+
+        span = collector.get_current_trace().spans[0]
+        assert span.cached_tokens == 600
+        assert tracker.spent_usd == approx(
+            bundled_pricing.estimate_call_cost("gpt-4o", 1000, 100, cached_tokens=600)
+        )
+        assert tracker.spent_usd < bundled_pricing.estimate_call_cost("gpt-4o", 1000, 100)
+
+    @requires_litellm
+    def test_missing_usage_fields_fall_back_to_estimate(self, monkeypatch, interceptor_stack):
+        interceptor, _, collector = interceptor_stack
+
+        response = MockResponse()
+        response.usage = SimpleNamespace(prompt_tokens=None, completion_tokens=7)
+        response.choices = None
+
+        monkeypatch.setattr(litellm, "completion", Mock(return_value=response))
+        interceptor.activate()
+        litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+        interceptor.deactivate()
+
+        span = collector.get_current_trace().spans[0]
+        assert span.output_tokens == 7
+        assert span.input_tokens > 0
+        assert span.output_preview is None
+
+    @requires_litellm
+    def test_exception_from_llm_still_recorded(self, monkeypatch, interceptor_stack):
+        interceptor, _, collector = interceptor_stack
+
+        def _raise(*args, **kwargs):
+            raise RuntimeError("Rate limited")
+
+        monkeypatch.setattr(litellm, "completion", _raise)
+        interceptor.activate()
+
+        with raises(RuntimeError, match="Rate limited"):
+            litellm.completion(model="gpt-4o", messages=[{"role": "user", "content": "test"}])
+        interceptor.deactivate()
 
         trace = collector.get_current_trace()
         assert trace.spans[-1].status == "error"
 
+    async def test_crewai_async_path_records_reported_usage(self, interceptor_stack):
+        interceptor, tracker, collector = interceptor_stack
 
-class TestLLMInterceptorErrors:
-    def test_double_activate_raises(self):
-        try:
-            import litellm  # noqa: F401
-        except ImportError:
-            pytest.skip("litellm not installed")
+        async def acall(self_obj, messages):
+            return MockResponse(prompt_tokens=120, completion_tokens=30)
 
-        tracker = BudgetTracker(run_id="test", max_usd=10.0)
-        counter = TokenCounter(backend="tiktoken")
-        pricing = PricingRegistry()
+        provider = Mock(model="gpt-4o")
+        await interceptor._intercept_crewai_call_async(
+            acall, provider, messages=[{"role": "user", "content": "hi"}]
+        )
+
+        span = collector.get_current_trace().spans[0]
+        assert span.input_tokens == 120
+        assert span.output_tokens == 30
+        assert tracker.get_summary()["total_input_tokens"] == 120
+
+    @requires_litellm
+    async def test_gather_preserves_order_and_bounds_concurrency(
+        self, monkeypatch, interceptor_stack
+    ):
+        interceptor, tracker, _ = interceptor_stack
+
+        in_flight = 0
+        peak = 0
+
+        async def fake_acompletion(model, messages):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return MockResponse(content=messages[0]["content"])
+
+        monkeypatch.setattr(litellm, "acompletion", fake_acompletion)
+        interceptor.activate()
+        results = await interceptor.gather(
+            (
+                litellm.acompletion(model="gpt-4o", messages=[{"role": "user", "content": str(i)}])
+                for i in range(10)
+            ),
+            max_concurrency=3,
+        )
+        interceptor.deactivate()
+
+        assert [r.content for r in results] == [str(i) for i in range(10)]
+        assert peak == 3
+        assert tracker.turn_count == 10
+        assert tracker.get_summary()["total_output_tokens"] == 50
+
+    async def test_gather_fails_fast_when_budget_exhausted(self, tiktoken_counter, bundled_pricing):
+        tracker = BudgetTracker(run_id="test", max_usd=0.01)
+        tracker.record_call(10, 10, "gpt-4o", 0.01, 0.0)
         collector = TraceCollector()
-        collector.start_trace("test")
+        interceptor = LLMInterceptor(tracker, tiktoken_counter, bundled_pricing, collector)
+
+        started = []
+
+        async def call():
+            started.append(True)
+
+        with raises(BudgetExceededError):
+            await interceptor.gather([call(), call()])
+
+        assert started == []
+
+    @mark.parametrize(
+        ("kwargs", "message"),
+        [
+            ({"max_concurrency": 0}, "max_concurrency"),
+            ({"rpm": 0}, "rpm"),
+            ({"rpm": -5}, "rpm"),
+        ],
+    )
+    async def test_gather_rejects_invalid_limits(self, interceptor_stack, kwargs, message):
+        interceptor, _, _ = interceptor_stack
+        started = []
+
+        async def call():
+            started.append(True)
+
+        with raises(ValueError, match=message):
+            await interceptor.gather([call()], **kwargs)
+
+        assert started == []
+
+
+class TestLLMInterceptorErrors:
+    @requires_litellm
+    def test_double_activate_raises(self, interceptor_stack):
+        interceptor, _, _ = interceptor_stack
 
-        interceptor = LLMInterceptor(tracker, counter, pricing, collector)
         interceptor.activate()
 
-        with pytest.raises(TetherError, match="already active"):
+        with raises(TetherError, match="already active"):
             interceptor.activate()
 
         interceptor.deactivate()
+
+
+class TestOptionalModule:
+    def test_missing_module_resolves_to_none(self):
+        assert _optional_module("tetherai_no_such_module") is None
+
+    def test_installed_module_is_cached(self):
+        import json
+
+        assert _optional_module("json") is json
+        _optional_module("json")
+        assert _optional_module.cache_info().hits >= 1
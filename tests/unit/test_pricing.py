@@ -1,44 +1,75 @@
-import pytest
+from pytest import approx, importorskip, mark, raises
 
 from tetherai.exceptions import UnknownModelError
-from tetherai.pricing import BUNDLED_PRICING, PricingRegistry, get_pricing_registry
+from tetherai.pricing import (
+    BUNDLED_PRICING,
+    CACHED_INPUT_PRICING,
+    MODEL_ALIASES,
+    PricingRegistry,
+    calc_cost,
+    get_pricing_registry,
+)
 
 
 class TestPricingRegistry:
-    def test_bundled_registry_has_major_models(self):
-        registry = PricingRegistry()
-        assert registry.get_input_cost("gpt-4o") > 0
-        assert registry.get_input_cost("gpt-4o-mini") > 0
-        assert registry.get_input_cost("claude-3-5-sonnet-20241022") > 0
-        assert registry.get_input_cost("claude-3-haiku-20240307") > 0
-
-    def test_input_cheaper_than_output(self):
-        registry = PricingRegistry()
-        for model in BUNDLED_PRICING:
-            input_cost = registry.get_input_cost(model)
-            output_cost = registry.get_output_cost(model)
-            assert input_cost <= output_cost, f"{model}: {input_cost} > {output_cost}"
-
-    def test_estimate_call_cost_math(self):
-        registry = PricingRegistry()
-        cost = registry.estimate_call_cost("gpt-4o", 1000, 500)
+    def test_bundled_registry_has_major_models(self, bundled_pricing):
+        assert bundled_pricing.get_input_cost("gpt-4o") > 0
+        assert bundled_pricing.get_input_cost("gpt-4o-mini") > 0
+        assert bundled_pricing.get_input_cost("claude-3-5-sonnet-20241022") > 0
+        assert bundled_pricing.get_input_cost("claude-3-haiku-20240307") > 0
+
+    @mark.parametrize("model", list(BUNDLED_PRICING))
+    def test_input_cheaper_than_output(self, bundled_pricing, model):
+        assert bundled_pricing.get_input_cost(model) <= bundled_pricing.get_output_cost(model)
+
+    def test_estimate_call_cost_math(self, bundled_pricing):
+        cost = bundled_pricing.estimate_call_cost("gpt-4o", 1000, 500)
         expected = (0.0025 * 1000 / 1000) + (0.01 * 500 / 1000)
         assert abs(cost - expected) < 0.0001
 
-    def test_unknown_model_raises(self):
-        registry = PricingRegistry()
-        with pytest.raises(UnknownModelError) as exc_info:
-            registry.get_input_cost("my-custom-model")
+    def test_calc_cost_matches_registry_estimate(self, bundled_pricing):
+        assert calc_cost(0.0025, 0.01, 1000, 500) == bundled_pricing.estimate_call_cost(
+            "gpt-4o", 1000, 500
+        )
+
+    def test_cached_tokens_billed_at_cached_rate(self, bundled_pricing):
+        full = bundled_pricing.estimate_call_cost("gpt-4o", 1000, 0)
+        cached = bundled_pricing.estimate_call_cost("gpt-4o", 1000, 0, cached_tokens=800)
+        assert cached == approx(0.0025 * 200 / 1000 + 0.00125 * 800 / 1000)
+        assert cached < full
+
+    def test_cached_rate_defaults_to_input_rate(self, bundled_pricing):
+        assert bundled_pricing.get_cached_input_cost("gpt-4") == bundled_pricing.get_input_cost(
+            "gpt-4"
+        )
+
+    def test_bulk_cost_matches_per_call_estimates(self, bundled_pricing):
+        models = ["gpt-4o", "gpt4o", "claude-3-haiku", "gpt-4o"]
+        input_tokens = [1000, 200, 3000, 0]
+        output_tokens = [500, 100, 0, 40]
+
+        costs = bundled_pricing.estimate_bulk_cost(models, input_tokens, output_tokens)
+
+        assert costs == [
+            bundled_pricing.estimate_call_cost(model, i, o)
+            for model, i, o in zip(models, input_tokens, output_tokens, strict=True)
+        ]
+
+    def test_bulk_cost_rejects_mismatched_lengths(self):
+        with raises(ValueError):
+            PricingRegistry().estimate_bulk_cost(["gpt-4o"], [10, 20], [5])
+
+    def test_unknown_model_raises(self, bundled_pricing):
+        with raises(UnknownModelError) as exc_info:
+            bundled_pricing.get_input_cost("my-custom-model")
         assert exc_info.value.model == "my-custom-model"
 
-    def test_model_alias_resolution(self):
-        registry = PricingRegistry()
-        assert registry.resolve_model_alias("gpt4o") == "gpt-4o"
-        assert registry.resolve_model_alias("claude-sonnet") == "claude-3-5-sonnet-20241022"
+    def test_model_alias_resolution(self, bundled_pricing):
+        assert bundled_pricing.resolve_model_alias("gpt4o") == "gpt-4o"
+        assert bundled_pricing.resolve_model_alias("claude-sonnet") == "claude-3-5-sonnet-20241022"
 
-    def test_zero_tokens_returns_zero_cost(self):
-        registry = PricingRegistry()
-        cost = registry.estimate_call_cost("gpt-4o", 0, 0)
+    def test_zero_tokens_returns_zero_cost(self, bundled_pricing):
+        cost = bundled_pricing.estimate_call_cost("gpt-4o", 0, 0)
         assert cost == 0.0
 
     def test_custom_model_registration(self):
@@ -47,17 +78,62 @@ class TestPricingRegistry:
         assert registry.get_input_cost("my-fine-tune") == 0.001
         assert registry.get_output_cost("my-fine-tune") == 0.002
 
+    def test_lookup_is_case_insensitive(self):
+        registry = PricingRegistry()
+        assert registry.get_input_cost(" GPT-4o-Mini ") == registry.get_input_cost("gpt-4o-mini")
+
+    def test_module_tables_use_lowercase_keys(self):
+        for table in (BUNDLED_PRICING, CACHED_INPUT_PRICING, MODEL_ALIASES):
+            assert all(key == key.lower() for key in table)
+        assert all(target == target.lower() for target in MODEL_ALIASES.values())
+
+    def test_bundled_pricing_is_read_only(self):
+        with raises(TypeError):
+            BUNDLED_PRICING["gpt-4o"] = (0.0, 0.0)  # type: ignore[index]
+
+    def test_custom_registration_does_not_leak_between_registries(self):
+        registry = PricingRegistry()
+        other = PricingRegistry()
+        registry.register_custom_model("gpt-4o", 0.5, 1.0)
+        assert other.get_input_cost("gpt-4o") == 0.0025
+        assert PricingRegistry().get_input_cost("gpt-4o") == 0.0025
+
+    def test_custom_override_applies_to_aliases(self):
+        registry = PricingRegistry()
+        registry.register_custom_model("gpt-4o", 0.5, 1.0)
+        assert registry.get_input_cost("gpt4o") == 0.5
+        assert registry.get_output_cost("gpt-4o") == 1.0
+
+    def test_lookup_cached_until_custom_registration(self):
+        registry = PricingRegistry()
+        assert registry.get_input_cost("gpt-4o") == 0.0025
+        assert registry._lookup.cache_info().currsize == 1
+
+        registry.register_custom_model("gpt-4o", 0.1, 0.2)
+        assert registry._lookup.cache_info().currsize == 0
+        assert registry.get_input_cost("gpt-4o") == 0.1
+
+    def test_get_rates_cached_until_custom_registration(self):
+        registry = PricingRegistry()
+        assert registry.get_rates("gpt-4o") == (0.0025, 0.01, 0.00125)
+        assert registry._rates.cache_info().currsize == 1
+
+        registry.register_custom_model("gpt-4o", 0.1, 0.2)
+        assert registry.get_rates("GPT-4o") == (0.1, 0.2, 0.1)
+
 
 class TestPricingRegistryLitellm:
     def test_litellm_backend_uses_litellm(self):
+        importorskip("litellm")
         registry = PricingRegistry(source="litellm")
-        try:
-            import litellm  # noqa: F401
+        cost = registry.get_input_cost("gpt-4o")
+        assert cost > 0
 
-            cost = registry.get_input_cost("gpt-4o")
-            assert cost > 0
-        except ImportError:
-            pytest.skip("litellm not installed")
+    def test_litellm_unmapped_model_raises_unknown_model(self):
+        importorskip("litellm")
+        registry = PricingRegistry(source="litellm")
+        with raises(UnknownModelError):
+            registry.get_rates("not-a-real-model-xyz")
 
     def test_bundled_backend_does_not_require_litellm(self):
         registry = PricingRegistry(source="bundled")
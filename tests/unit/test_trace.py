@@ -1,8 +1,31 @@
+import json
+import sys
 from datetime import datetime
+from unittest.mock import Mock
 
+import pytest
+
+from tetherai.budget import BudgetTracker
 from tetherai.trace import Span, Trace, TraceCollector, generate_id
 
 
+@pytest.fixture(scope="module")
+def sum_trace():
+    # Read-only: tests must not add spans to or finalize this trace.
+    trace = Trace(run_id="test-123")
+    trace.add_span(Span(run_id="test", cost_usd=0.01))
+    trace.add_span(Span(run_id="test", cost_usd=0.02))
+    trace.add_span(Span(run_id="test", cost_usd=0.03))
+    return trace
+
+
+@pytest.fixture(scope="module")
+def small_trace():
+    trace = Trace(run_id="test-123", budget_summary={"budget_usd": 2.0, "spent_usd": 1.5})
+    trace.add_span(Span(run_id="test-123", cost_usd=0.01))
+    return trace
+
+
 class TestSpan:
     def test_span_creation_with_required_fields(self):
         span = Span(run_id="test-123")
@@ -10,11 +33,14 @@ class TestSpan:
         assert span.span_id is not None
 
     def test_span_id_is_unique(self):
-        ids = set()
-        for _ in range(1000):
-            ids.add(generate_id())
+        ids = {generate_id() for _ in range(1000)}
         assert len(ids) == 1000
 
+    def test_generated_id_is_16_hex_chars(self):
+        span_id = generate_id()
+        assert len(span_id) == 16
+        int(span_id, 16)
+
     def test_span_parent_child_relationship(self):
         parent = Span(run_id="test", span_id="parent-123")
         child = Span(run_id="test", span_id="child-456", parent_span_id="parent-123")
@@ -32,6 +58,32 @@ class TestSpan:
         assert len(span.output_preview) == 203
         assert span.output_preview.endswith("...")
 
+    def test_span_model_is_interned(self):
+        model = "".join(["gpt-", "4o"])
+        span = Span(run_id="test", model=model)
+        assert span.model is sys.intern("gpt-4o")
+
+    def test_span_accepts_str_subclass_model(self):
+        class ModelName(str):
+            pass
+
+        assert Span(run_id="test", model=ModelName("gpt-4o")).model == "gpt-4o"
+
+    def test_span_has_no_instance_dict(self):
+        span = Span(run_id="test")
+        assert not hasattr(span, "__dict__")
+
+    def test_span_finalize_sets_completion_fields(self):
+        span = Span(run_id="test", input_tokens=10)
+        span.finalize(5, 12, 0.002, 31.5, output_preview="c" * 500)
+
+        assert span.output_tokens == 5
+        assert span.input_tokens == 12
+        assert span.cost_usd == 0.002
+        assert span.duration_ms == 31.5
+        assert span.status == "ok"
+        assert len(span.output_preview) == 203
+
     def test_span_to_dict_serializable(self):
         span = Span(
             run_id="test-123",
@@ -51,44 +103,63 @@ class TestTrace:
         trace = Trace(run_id="test-123")
         span1 = Span(run_id="test-123", span_type="agent_step")
         span2 = Span(run_id="test-123", span_type="llm_call")
-
-        import time
-
-        time.sleep(0.01)
-        span2.timestamp = datetime.now()
+        span1.timestamp = datetime(2024, 1, 1, 0, 0, 0)
+        span2.timestamp = datetime(2024, 1, 1, 0, 0, 1)
 
         trace.add_span(span1)
         trace.add_span(span2)
 
         assert trace.spans[0].timestamp <= trace.spans[1].timestamp
 
-    def test_trace_total_cost(self):
-        trace = Trace(run_id="test-123")
-        trace.add_span(Span(run_id="test", cost_usd=0.01))
-        trace.add_span(Span(run_id="test", cost_usd=0.02))
-        trace.add_span(Span(run_id="test", cost_usd=0.03))
-
-        assert trace.total_cost == 0.06
+    def test_trace_total_cost(self, sum_trace):
+        assert sum_trace.total_cost == 0.06
 
-    def test_trace_to_dict_serializable(self):
+    def test_totals_reflect_spans_finalized_after_add(self):
         trace = Trace(run_id="test-123")
-        trace.add_span(Span(run_id="test-123", cost_usd=0.01))
+        span = Span(run_id="test", input_tokens=10)
+        trace.add_span(span)
+        span.finalize(output_tokens=5, input_tokens=12, cost_usd=0.02, duration_ms=1.0)
 
-        d = trace.to_dict()
-        assert isinstance(d, dict)
-        assert "run_id" in d
-        assert "spans" in d
+        assert trace.totals() == (0.02, 12, 5)
+        assert trace.total_output_tokens == 5
 
-    def test_budget_summary_included(self):
-        summary = {"budget_usd": 2.0, "spent_usd": 1.5}
-        trace = Trace(run_id="test-123", budget_summary=summary)
+    def test_trace_to_dict_serializable(self, small_trace):
+        assert {"run_id", "spans"}.issubset(small_trace.to_dict())
 
-        d = trace.to_dict()
+    def test_budget_summary_included(self, small_trace):
+        d = small_trace.to_dict()
         assert d["budget_summary"]["budget_usd"] == 2.0
         assert d["budget_summary"]["spent_usd"] == 1.5
 
+    def test_to_dict_uses_span_serializer(self):
+        trace = Trace(run_id="test-123")
+        span = Span(run_id="test-123")
+        trace.add_span(span)
+
+        assert trace.to_dict(lambda s: s.span_id)["spans"] == [span.span_id]
+
+    def test_summary_dict_is_to_dict_without_spans(self, small_trace):
+        full = small_trace.to_dict()
+        del full["spans"]
+        assert small_trace.summary_dict() == full
+        assert list(small_trace.to_dict())[:2] == ["run_id", "spans"]
+
+    def test_trace_has_no_instance_dict(self):
+        assert not hasattr(Trace(run_id="test-123"), "__dict__")
+
 
 class TestTraceCollector:
+    def test_budget_summary_stored_as_plain_dicts(self):
+        tracker = BudgetTracker(run_id="run-123", max_usd=10.0)
+        collector = TraceCollector()
+        collector.start_trace("run-123", tracker.get_summary())
+        tracker.record_call(100, 50, "gpt-4o", 0.50, 100.0)
+
+        trace = collector.end_trace(tracker.get_summary())
+
+        assert type(trace.budget_summary["calls_by_model"]) is dict
+        assert json.loads(json.dumps(trace.to_dict()))["budget_summary"]["turn_count"] == 1
+
     def test_trace_collector_starts_and_ends_trace(self):
         collector = TraceCollector()
         trace = collector.start_trace("run-123")
@@ -107,6 +178,41 @@ class TestTraceCollector:
         trace = collector.get_current_trace()
         assert len(trace.spans) == 1
 
+    def test_trace_collector_enqueue_visible_on_read(self):
+        collector = TraceCollector()
+        collector.start_trace("run-123")
+        first = Span(run_id="run-123", model="gpt-4o")
+        second = Span(run_id="run-123", model="gpt-4o-mini")
+        collector.enqueue(first)
+        collector.enqueue(second)
+
+        trace = collector.get_current_trace()
+        assert trace.spans == [first, second]
+
+    def test_trace_collector_enqueue_flushed_on_end(self):
+        collector = TraceCollector()
+        collector.start_trace("run-123")
+        collector.enqueue(Span(run_id="run-123"))
+
+        ended = collector.end_trace()
+        assert len(ended.spans) == 1
+
+        collector.start_trace("run-456")
+        assert collector.get_current_trace().spans == []
+
+    def test_trace_collector_write_span_streams_to_writer(self):
+        written = []
+        collector = TraceCollector(span_writer=written.append)
+        span = Span(run_id="run-123", model="gpt-4o")
+        collector.write_span(span)
+        assert written == [span]
+
+    def test_trace_collector_write_span_logs_writer_errors(self, caplog):
+        collector = TraceCollector(span_writer=Mock(side_effect=OSError("disk full")))
+        span = Span(run_id="run-123", model="gpt-4o")
+        collector.write_span(span)
+        assert span.span_id in caplog.text
+
     def test_trace_collector_no_current_trace(self):
         collector = TraceCollector()
         assert collector.get_current_trace() is None